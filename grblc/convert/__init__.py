@@ -4,3 +4,12 @@ Make sure you are in the directory, and then start Jupyter notebook or Jupyter l
 and import as any other module.
 """
 from .convert import *
+
+
+def __getattr__(name):
+    # `ebv2A_b_df` is loaded the first time it's accessed (see `constants`)
+    if name == "ebv2A_b_df":
+        from . import constants
+
+        return constants.ebv2A_b_df
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
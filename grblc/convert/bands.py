@@ -0,0 +1,185 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .constants import photometry
+
+__all__ = [
+    "BAND_NAMES",
+    "UNSUPPORTED",
+    "normalize_band",
+    "band_code",
+    "band_codes",
+    "get_band_table",
+]
+
+# integer code of each band is its position in `photometry`; -1 means unsupported
+BAND_NAMES = tuple(photometry)
+UNSUPPORTED = -1
+
+_band_index = {name: i for i, name in enumerate(BAND_NAMES)}
+
+# spellings of each band that show up in magnitude tables, besides its name
+_decorations = ("'", "_", "(AB)", "(ab)", "(Vega)", "(vega)")
+_uv_bands = ("w1", "w2", "m2")
+
+
+def normalize_band(band: str, source: str = "manual"):
+    """Returns the key of `photometry` that a spelling of a band refers to.
+
+    Primes, underscores and parenthesized suffixes are dropped (e.g., "g'",
+    "R_c", "V(ab)"), Swift UV bands get their "uv" prefix ("w1" -> "uvw1"),
+    and bands from UVOT get a "_swift" suffix. The result is only a key of
+    `photometry` if the band is supported.
+    """
+    band = re.sub(r"(\'|_|\\|\(.+\))", "", band)
+    band = re.sub(r"(?<![A-Za-z])([mw]\d)", r"uv\1", band)
+    if source == "uvot":
+        band += "_swift"
+    return band if band != "v" else "V"
+
+
+def _spellings():
+    # candidate spellings of every band, e.g. "R", "R'", "R_c", "R(AB)", "w1", "uvw1"
+    bases = {name[: -len("_swift")] if name.endswith("_swift") else name for name in BAND_NAMES}
+    bases.update(_uv_bands)
+    bases.add("v")
+    for base in bases:
+        yield base
+        for decoration in _decorations:
+            yield base + decoration
+        if len(base) > 1:
+            yield f"{base[0]}_{base[1:]}"
+
+
+def _build_aliases():
+    # {spelling: code} for manual (False) and UVOT (True) bands, made by running
+    # every candidate spelling through `normalize_band`, so a hit here always
+    # agrees with the slow path
+    aliases = {False: {}, True: {}}
+    for spelling in _spellings():
+        for uvot, table in aliases.items():
+            code = _band_index.get(normalize_band(spelling, "uvot" if uvot else "manual"))
+            if code is not None:
+                table[spelling] = code
+    return aliases
+
+
+_aliases = None
+
+
+def _get_aliases():
+    global _aliases
+    if _aliases is None:
+        _aliases = _build_aliases()
+    return _aliases
+
+
+@lru_cache(maxsize=4096)
+def _band_code_slow(band, uvot):
+    return _band_index.get(normalize_band(band, "uvot" if uvot else "manual"), UNSUPPORTED)
+
+
+def band_code(band: str, source: str = "manual"):
+    """Returns the integer code of a band (its index in `BAND_NAMES`), or -1 if unsupported.
+
+    Known spellings are a dictionary lookup; anything else is normalized with
+    `normalize_band` once and remembered.
+    """
+    uvot = source == "uvot"
+    code = _get_aliases()[uvot].get(band)
+    if code is None:
+        code = _band_code_slow(band, uvot)
+    return code
+
+
+def band_codes(band, source="manual"):
+    """Returns the integer codes of a column of bands (see `band_code`).
+
+    Each distinct band is resolved once, so a column of any length costs one
+    hashing pass plus one lookup per distinct spelling.
+
+    Parameters
+    ----------
+    band : array_like of str
+        Bands, in any spelling.
+    source : str or array_like of str, optional
+        Source of each band, by default "manual". Only "uvot" changes how a
+        band is resolved.
+
+    Returns
+    -------
+    numpy.ndarray
+        Codes as int64, with -1 for unsupported bands.
+    """
+    band = np.asarray(band, dtype=object)
+    source = np.asarray(source, dtype=object)
+    if source.ndim > 0:
+        band, source = np.broadcast_arrays(band, source)
+
+    shape = band.shape
+    inverse, uniques = pd.factorize(band.ravel(), use_na_sentinel=False)
+    uniques = [str(u) for u in uniques]
+
+    if source.ndim == 0:
+        codes = np.array([band_code(u, source.item()) for u in uniques], dtype=np.int64)
+        return codes[inverse].reshape(shape)
+
+    manual = np.array([band_code(u) for u in uniques], dtype=np.int64)
+    uvot = np.array([band_code(u, "uvot") for u in uniques], dtype=np.int64)
+    is_uvot = source.ravel() == "uvot"
+    return np.where(is_uvot, uvot[inverse], manual[inverse]).reshape(shape)
+
+
+_band_table = None
+
+
+def get_band_table():
+    """Returns the metadata of every band as a read-only structured array indexed by band code.
+
+    The table is built the first time it's needed, from `photometry` and the
+    Schlafly & Finkbeiner (2011) coefficients in ``SF11_conversions.txt``, so
+    the metadata of a whole column of bands is one fancy index, e.g.
+    ``get_band_table()[band_codes(bands)]["wavelength"]``.
+
+    Fields are ``name``, ``wavelength`` [angstrom], ``zero_point``
+    [erg cm-2 s-1 Hz-1], ``bandpass`` (the bandpass used for extinction), and
+    ``sf11`` (A_b / E(B-V) for R_V = 3.1, NaN if SF11 doesn't cover the
+    bandpass). The table has one more row than
+    there are bands, with an empty name and NaNs, so unsupported bands (code
+    -1) come out as NaN.
+
+    Returns
+    -------
+    numpy.ndarray
+        The band table.
+    """
+    global _band_table
+
+    if _band_table is None:
+        from . import constants
+
+        sf11 = constants.ebv2A_b_df["3.1"]
+        bandpasses = [photometry[name][2] for name in BAND_NAMES]
+        dtype = np.dtype(
+            [
+                ("name", f"U{max(map(len, BAND_NAMES))}"),
+                ("wavelength", np.float64),
+                ("zero_point", np.float64),
+                ("bandpass", f"U{max(map(len, bandpasses))}"),
+                ("sf11", np.float64),
+            ]
+        )
+        rows = [
+            (name, photometry[name][0], photometry[name][1], bandpass, sf11.get(bandpass, np.nan))
+            for name, bandpass in zip(BAND_NAMES, bandpasses)
+        ]
+        rows.append(("", np.nan, np.nan, "", np.nan))
+
+        table = np.array(rows, dtype=dtype)
+        table.flags.writeable = False
+        _band_table = table
+
+    return _band_table
@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import threading
+
+__all__ = [
+    "ExtinctionCache",
+    "default_cache_path",
+    "get_extinction_cache",
+    "close_extinction_cache",
+]
+
+CACHE_FILENAME = "extinction_cache.sqlite"
+
+# positions are quantized to this many degrees (0.036") before being used as keys,
+# far below the ~2.4' pixel size of the SFD map
+POSITION_PRECISION = 1e-5
+
+
+def default_cache_path():
+    """Returns the default location of the cache, next to the dust maps it caches
+    values from (the ``data_dir`` of the SFD configuration)."""
+    from .sfd import std_paths
+
+    return os.path.join(std_paths.data_dir(), CACHE_FILENAME)
+
+
+class ExtinctionCache:
+    """A persistent cache of E(B-V) values keyed by sky position.
+
+    Values are stored in an SQLite database, so a full re-conversion reads
+    E(B-V) from the cache instead of the dust map. The database also keeps
+    the GRB positions found by `PositionResolver`. The database runs in WAL
+    mode, so several processes can read and write it at once, and every
+    process opens its own connection. Values read or written in this process
+    are also kept in memory, so repeated lookups don't touch the database.
+
+    Any failure to open or use the database, including not being able to
+    create its directory, is raised as `sqlite3.Error`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path of the SQLite database, by default `default_cache_path()`.
+        It is created if it doesn't exist.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or default_cache_path())
+        self._memory = {}
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(ra, dec, map_id="sfd"):
+        """Returns the cache key for a position in degrees and a dust map."""
+        return (
+            map_id,
+            int(round(float(ra) / POSITION_PRECISION)),
+            int(round(float(dec) / POSITION_PRECISION)),
+        )
+
+    def _connection(self):
+        # connections can't be shared with forked children, so reopen after a fork
+        if self._conn is None or self._pid != os.getpid():
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            except OSError as error:
+                raise sqlite3.OperationalError(
+                    f"unable to create the directory of {self.path}: {error}"
+                ) from error
+            conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS ebv ("
+                    "map TEXT NOT NULL, ra INTEGER NOT NULL, dec INTEGER NOT NULL, "
+                    "ebv REAL NOT NULL, PRIMARY KEY (map, ra, dec))"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS positions ("
+                    "name TEXT PRIMARY KEY, ra REAL NOT NULL, dec REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS missing_positions (name TEXT PRIMARY KEY)"
+                )
+                conn.commit()
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+            self._pid = os.getpid()
+            self._memory = {}
+        return self._conn
+
+    def get(self, ra, dec, map_id="sfd"):
+        """Returns the cached E(B-V) at a position, or None if it isn't cached.
+
+        Parameters
+        ----------
+        ra : float
+            Right ascension in degrees.
+        dec : float
+            Declination in degrees.
+        map_id : str, optional
+            Identifier of the dust map the value comes from, by default "sfd".
+
+        Returns
+        -------
+        float or None
+            The cached E(B-V).
+        """
+        key = self.key(ra, dec, map_id)
+        with self._lock:
+            if key in self._memory and self._pid == os.getpid():
+                return self._memory[key]
+
+            row = (
+                self._connection()
+                .execute("SELECT ebv FROM ebv WHERE map=? AND ra=? AND dec=?", key)
+                .fetchone()
+            )
+            if row is None:
+                return None
+
+            self._memory[key] = row[0]
+            return row[0]
+
+    def put(self, ra, dec, ebv, map_id="sfd"):
+        """Stores the E(B-V) at a position. See `get` for the parameters."""
+        key = self.key(ra, dec, map_id)
+        ebv = float(ebv)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO ebv VALUES (?, ?, ?, ?)", (*key, ebv))
+            self._memory[key] = ebv
+
+    def get_position(self, name):
+        """Returns the cached (ra, dec) of a GRB in degrees, or None if it isn't cached."""
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT ra, dec FROM positions WHERE name=?", (name,))
+                .fetchone()
+            )
+            return None if row is None else tuple(row)
+
+    def put_position(self, name, ra, dec):
+        """Stores the position of a GRB in degrees."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO positions VALUES (?, ?, ?)",
+                    (name, float(ra), float(dec)),
+                )
+                conn.execute("DELETE FROM missing_positions WHERE name=?", (name,))
+
+    def is_missing_position(self, name):
+        """Returns whether an earlier lookup of a GRB's position found nothing."""
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT 1 FROM missing_positions WHERE name=?", (name,))
+                .fetchone()
+            )
+            return row is not None
+
+    def put_missing_position(self, name):
+        """Records that the position of a GRB couldn't be found."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO missing_positions VALUES (?)", (name,))
+
+    def clear_missing_positions(self):
+        """Forgets every failed position lookup, so they are tried again."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM missing_positions")
+
+    def clear(self):
+        """Removes every cached E(B-V) value, e.g. after the dust map was replaced."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM ebv")
+            self._memory = {}
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM ebv").fetchone()[0]
+
+    def close(self):
+        """Closes this process's connection to the database."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._memory = {}
+
+
+_extinction_cache = None
+_extinction_cache_lock = threading.Lock()
+
+
+def get_extinction_cache(path=None):
+    """Returns the process-wide `ExtinctionCache` used by `ebv2A_b`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path of the database. By default the currently open cache is reused,
+        or `default_cache_path()` is opened if there is none yet. Passing a
+        different path switches the shared cache to it.
+
+    Returns
+    -------
+    ExtinctionCache
+        The shared cache.
+    """
+    global _extinction_cache
+
+    with _extinction_cache_lock:
+        if (
+            _extinction_cache is not None
+            and path is not None
+            and os.path.abspath(path) != _extinction_cache.path
+        ):
+            _extinction_cache.close()
+            _extinction_cache = None
+
+        if _extinction_cache is None:
+            _extinction_cache = ExtinctionCache(path)
+
+        return _extinction_cache
+
+
+def close_extinction_cache():
+    """Closes the shared cache. The next `get_extinction_cache` call reopens it."""
+    global _extinction_cache
+
+    with _extinction_cache_lock:
+        if _extinction_cache is not None:
+            _extinction_cache.close()
+        _extinction_cache = None
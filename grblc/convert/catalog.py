@@ -0,0 +1,200 @@
+import os
+import re
+import threading
+
+import numpy as np
+from pandas import read_csv
+from pandas import to_numeric
+
+from ..util import str_array
+
+__all__ = ["GRBCatalog", "get_grb_catalog", "normalize_grb_name"]
+
+GRB_ATTRS_PATH = os.path.join(os.path.dirname(__file__), "grb_attrs.txt")
+
+_name_regex = re.compile(r"^(?:GRB)?[\s_]*(\d{6})[\s_]*([A-Za-z]?)$", re.IGNORECASE)
+
+
+def normalize_grb_name(name):
+    """Returns the canonical form of a GRB name, e.g. ``"GRB 050525a"`` -> ``"050525A"``.
+
+    Names that don't look like ``YYMMDD[X]`` are returned stripped but otherwise unchanged.
+    """
+    name = str(name).strip()
+    match = _name_regex.match(name)
+    if match is None:
+        return name
+    return match[1] + match[2].upper()
+
+
+def sexagesimal_to_deg(values, hours=False):
+    """Converts ``"[+-]DD:MM:SS.s"`` strings to degrees, with NaN for anything else.
+
+    Parameters
+    ----------
+    values : array_like of str
+        Sexagesimal angles.
+    hours : bool, optional
+        Whether the values are in hours (e.g., right ascension), by default False.
+
+    Returns
+    -------
+    numpy.ndarray
+        The angles in degrees.
+    """
+    values = str_array(values)
+    out = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        fields = value.strip().split(":")
+        if len(fields) != 3:
+            continue
+        try:
+            d, m, s = (abs(float(f)) for f in fields)
+        except ValueError:
+            continue
+        sign = -1.0 if fields[0].startswith("-") else 1.0
+        out[i] = sign * (d + m / 60.0 + s / 3600.0)
+
+    return out * 15.0 if hours else out
+
+
+class GRBCatalog:
+    """The GRB attributes of ``grb_attrs.txt``, parsed once and indexed by name.
+
+    Numeric columns are stored as float64 arrays (NaN where the table has
+    ``n/a``), and positions are converted to degrees when the table is loaded,
+    so looking up a GRB is a dictionary access. Use `get_grb_catalog` to share
+    one catalog per process.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path of the attribute table, by default the packaged ``grb_attrs.txt``.
+
+    Attributes
+    ----------
+    names : numpy.ndarray
+        Normalized GRB names.
+    photon_index, photon_index_err, T90, z : numpy.ndarray
+        Float columns of the table.
+    trigger_date, trigger_time : numpy.ndarray
+        Trigger date and UT time strings, as in the table.
+    ra, dec : numpy.ndarray
+        Position in degrees.
+    """
+
+    float_columns = ("photon_index", "photon_index_err", "T90", "z")
+
+    def __init__(self, path=GRB_ATTRS_PATH):
+        self.path = path
+        df = read_csv(
+            path,
+            delimiter=r"\t+|\s+",
+            header=0,
+            dtype=str,
+            engine="python",
+        )
+        name_column = df.columns[0]
+
+        self.names = np.array([normalize_grb_name(n) for n in df[name_column]], dtype=str)
+        for column in self.float_columns:
+            setattr(self, column, to_numeric(df[column], errors="coerce").to_numpy(np.float64))
+        self.trigger_date = str_array(df["trigger_date"])
+        self.trigger_time = str_array(df["trigger_time"])
+        self.ra = sexagesimal_to_deg(df["ra"], hours=True)
+        self.dec = sexagesimal_to_deg(df["dec"])
+
+        # the first row is used if a name is repeated
+        self._index = {}
+        for i, name in enumerate(self.names):
+            self._index.setdefault(name, i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return normalize_grb_name(name) in self._index
+
+    def index(self, name):
+        """Returns the row of a GRB in the catalog arrays.
+
+        Raises
+        ------
+        KeyError
+            If the GRB isn't in the catalog.
+        """
+        try:
+            return self._index[normalize_grb_name(name)]
+        except KeyError:
+            raise KeyError(name) from None
+
+    def __getitem__(self, name):
+        """Returns all attributes of a GRB as a dict."""
+        i = self.index(name)
+        entry = {"GRB": str(self.names[i])}
+        for column in self.float_columns:
+            entry[column] = float(getattr(self, column)[i])
+        entry["trigger_date"] = str(self.trigger_date[i])
+        entry["trigger_time"] = str(self.trigger_time[i])
+        entry["ra"] = float(self.ra[i])
+        entry["dec"] = float(self.dec[i])
+        return entry
+
+    def get(self, name, default=None):
+        """Returns the attributes of a GRB as a dict, or ``default`` if it isn't in the catalog."""
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def photon_index_of(self, name):
+        """Returns (photon_index, photon_index_err) of a GRB.
+
+        Raises
+        ------
+        KeyError
+            If the GRB isn't in the catalog or has no photon index.
+        """
+        i = self.index(name)
+        if np.isnan(self.photon_index[i]) or np.isnan(self.photon_index_err[i]):
+            raise KeyError(name)
+        return float(self.photon_index[i]), float(self.photon_index_err[i])
+
+    def trigger_of(self, name):
+        """Returns the trigger date and time of a GRB as one ``"YYYY-MM-DD hh:mm:ss"`` string."""
+        i = self.index(name)
+        return f"{self.trigger_date[i]} {self.trigger_time[i]}"
+
+    def position_of(self, name):
+        """Returns the (ra, dec) of a GRB in degrees, or None if it isn't known."""
+        i = self._index.get(normalize_grb_name(name))
+        if i is None or np.isnan(self.ra[i]) or np.isnan(self.dec[i]):
+            return None
+        return float(self.ra[i]), float(self.dec[i])
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_grb_catalog(path=None):
+    """Returns the process-wide `GRBCatalog`, loading it on first use.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path of the attribute table. By default the loaded catalog is reused,
+        or the packaged ``grb_attrs.txt`` is loaded if there is none yet.
+        Passing a different path reloads the catalog from there.
+
+    Returns
+    -------
+    GRBCatalog
+        The shared catalog.
+    """
+    global _catalog
+
+    with _catalog_lock:
+        if _catalog is None or (path is not None and path != _catalog.path):
+            _catalog = GRBCatalog(path if path is not None else GRB_ATTRS_PATH)
+        return _catalog
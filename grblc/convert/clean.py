@@ -1,60 +1,251 @@
+import json
 import os
-from functools import reduce
-import glob2
+
+import numpy as np
 import pandas as pd
 
+from ..util import is_columnar
+from ..util import read_columnar
+from .convert import OUTPUT_FORMATS
+from .convert import _open_writer
+from .dirindex import get_directory_index
+
+DEDUPE_METHODS = ("first", "mean", "weighted")
+
+_COLUMNS = ["time_sec", "flux", "flux_err", "band"]
+
+
+def clean_grbs(main_dir, dedupe="first", n_workers=1):
+    """Cleans every converted flux table in ``main_dir``, optionally in parallel.
+
+    Points at unphysical (non-positive or non-finite) times are dropped, and
+    points at the same time are merged into one. Each
+    ``<GRB>_converted_flux.<ext>`` gets a cleaned copy,
+    ``<GRB>_converted_flux_cleaned.<ext>``, in the same format. If a GRB was
+    converted to several formats, the columnar table is used.
+
+    GRBs with unphysical times, which usually means a wrong trigger time, are
+    listed in ``unphysical_times.txt``, and a summary of the whole run is
+    written to ``clean_summary.json`` in ``main_dir``.
+
+    Parameters
+    ----------
+    main_dir : str
+        Directory holding the ``<GRB>_flux`` directories.
+    dedupe : str, optional
+        How points at the same time are merged: "first" keeps the first one
+        (the default), "mean" averages them (with the error of the mean), and
+        "weighted" takes their inverse-variance weighted mean (falling back to
+        the plain mean if any of them has no error, i.e. a non-positive or
+        non-finite one).
+    n_workers : int, optional
+        Number of worker processes, by default 1, which cleans in this process.
+        None uses one worker per CPU.
+
+    Returns
+    -------
+    dict
+        The summary: the ``dedupe`` method, ``totals`` over all GRBs, and per
+        GRB (under ``grbs``) the input ``path``, cleaned ``output``, and number
+        of ``points``, ``unphysical`` and ``duplicate`` points dropped, and
+        points ``kept``, or the ``error`` if it couldn't be cleaned.
+
+    Raises
+    ------
+    ValueError
+        If ``dedupe`` isn't one of `DEDUPE_METHODS`.
+    """
+    if dedupe not in DEDUPE_METHODS:
+        raise ValueError(
+            f"Dedupe method '{dedupe}' isn't supported. Use one of {', '.join(DEDUPE_METHODS)}."
+        )
 
-def clean_grbs(main_dir):
-
-    # grab all filepaths for LCs in magnitude
-    glob_path = reduce(os.path.join, [main_dir, "*_flux", "*_converted_flux.txt"])
-    filepaths = glob2.glob(glob_path)
-
-    num_dupes = 0
-    num_successful = 0
-    num_points = 0
-    num_dupe_points = 0
-    unphysical_times = {"grb": [], "filepath": []}
-    for filepath in filepaths:
-        grb = os.path.split(filepath)[-1].rstrip("_flux.txt")
-        df = pd.read_csv(filepath, delimiter=r"\t+|\s+", engine="python", header=0).copy()
-
-        # get rid of duplicate times! this keeps the first instance of the duplicate
-        duplicates = df.duplicated("time_sec")
-        # df = df[~duplicates]
-        num_points += len(duplicates)
-        num_dupe_points += sum(duplicates)
-        if sum(duplicates) > 0:
-            num_dupes += 1
-            # print(f"[{grb}] Cleaning {sum(duplicates)} duplicates. ({sum(duplicates)}/{len(duplicates)})")
-
-        lt0 = df["time_sec"] <= 0
-        if sum(lt0) > 0:
-            print(f"[{grb}] Seeing negative times, which means incorrect inputted time(s) :(")
-            unphysical_times["grb"].append(grb)
-            unphysical_times["filepath"].append(filepath)
-            continue
-
-        num_successful += 1
-        # df.to_csv(os.path.join(os.path.split(filepath)[0], f"{grb}_converted_flux_cleaned.txt"), sep="\t", index=None)
-
-    unphysical_df = pd.DataFrame.from_dict(unphysical_times)
-    unphysical_path = os.path.join(main_dir, "unphysical_times.txt")
-    unphysical_df.to_csv(unphysical_path, sep="\t", index=None)
+    # grab all filepaths for LCs in flux
+    # if a GRB was converted to several formats, the columnar table is used
+    index = get_directory_index(main_dir)
+    index.refresh()
+    tables = {}
+    for suffix in OUTPUT_FORMATS.values():
+        for path in index.glob(f"*_flux/*_converted_flux{suffix}"):
+            tables[path[: -len(suffix)]] = path
+    filepaths = sorted(tables.values())
 
+    results = {}
+    for result in _clean_many(filepaths, dedupe, n_workers):
+        results[result.pop("GRB")] = result
+    results = dict(sorted(results.items()))
+
+    unphysical = [grb for grb, r in results.items() if r.get("unphysical", 0) > 0]
+    for grb in unphysical:
+        print(f"[{grb}] Seeing negative times, which means incorrect inputted time(s) :(")
+    unphysical_df = pd.DataFrame(
+        {"grb": unphysical, "filepath": [results[grb]["path"] for grb in unphysical]}
+    )
+    unphysical_df.to_csv(os.path.join(main_dir, "unphysical_times.txt"), sep="\t", index=None)
+
+    totals = {
+        key: sum(r.get(key, 0) for r in results.values())
+        for key in ("points", "unphysical", "duplicates", "kept")
+    }
+    totals["grbs"] = len(results)
+    totals["errors"] = sum("error" in r for r in results.values())
+    summary = {"dedupe": dedupe, "totals": totals, "grbs": results}
+    with open(os.path.join(main_dir, "clean_summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    discarded = totals["unphysical"] + totals["duplicates"]
     print(
         "=" * 30,
-        # "\nStats\nFiles with Duplicate Times:",
-        # num_dupes,
         "\nFiles with unphysical times:",
-        len(unphysical_times["grb"]),
+        len(unphysical),
         "\nTotal GRBs:",
-        len(filepaths),
+        totals["grbs"],
         "\nNum. Successful:",
-        num_successful,
+        totals["grbs"] - totals["errors"],
         "\nTotal Points:",
-        num_points,
+        totals["points"],
         "\nTotal Discarded Points:",
-        num_dupe_points,
-        f"({100*num_dupe_points/num_points:.1f}%)",
+        discarded,
+        f"({100 * discarded / max(totals['points'], 1):.1f}%)",
+    )
+
+    return summary
+
+
+def dedupe_times(df, method="first"):
+    """Merges the points of a flux table that are at the same time.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table with ``time_sec``, ``flux`` and ``flux_err`` columns, and
+        optionally ``band``.
+    method : str, optional
+        "first", "mean" or "weighted", as in `clean_grbs`. By default "first".
+
+    Returns
+    -------
+    pandas.DataFrame
+        One point per time, in order of first appearance. Merged points keep
+        the band of the first one, and points alone at their time are kept
+        as they are.
+    """
+    if method == "first":
+        return df.drop_duplicates("time_sec", keep="first").reset_index(drop=True)
+    if method not in DEDUPE_METHODS:
+        raise ValueError(f"Dedupe method '{method}' isn't supported.")
+
+    flux = df["flux"].to_numpy(np.float64)
+    err = df["flux_err"].to_numpy(np.float64)
+    no_err = ~np.isfinite(err) | (err <= 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(no_err, 0.0, 1 / err ** 2)
+
+    work = pd.DataFrame(
+        {
+            "time_sec": df["time_sec"].to_numpy(np.float64),
+            "flux": flux,
+            "var": err ** 2,
+            "w": weight,
+            "wf": weight * flux,
+            "no_err": no_err,
+        }
+    )
+    sums = work.groupby("time_sec", sort=False, dropna=False).agg(
+        flux=("flux", "mean"),
+        var=("var", "sum"),
+        w=("w", "sum"),
+        wf=("wf", "sum"),
+        no_err=("no_err", "any"),
+        n=("flux", "size"),
+    )
+
+    # mean with the error of the mean
+    out_flux = sums["flux"].to_numpy(copy=True)
+    out_err = np.sqrt(sums["var"].to_numpy()) / sums["n"].to_numpy()
+    if method == "weighted":
+        # times where every point has an error use inverse-variance weights
+        weighted = ~sums["no_err"].to_numpy()
+        w = sums["w"].to_numpy()[weighted]
+        out_flux[weighted] = sums["wf"].to_numpy()[weighted] / w
+        out_err[weighted] = 1 / np.sqrt(w)
+
+    # points alone at their time are passed through as they are
+    first = ~df["time_sec"].duplicated(keep="first").to_numpy()
+    single = sums["n"].to_numpy() == 1
+    out_flux[single] = flux[first][single]
+    out_err[single] = err[first][single]
+
+    out = pd.DataFrame(
+        {"time_sec": sums.index.to_numpy(), "flux": out_flux, "flux_err": out_err}
     )
+    if "band" in df:
+        out["band"] = df["band"].to_numpy()[first]
+    return out
+
+
+def _read_flux_table(path):
+    if is_columnar(path):
+        return read_columnar(path)
+    return pd.read_csv(path, sep=r"\s+", header=0)
+
+
+def _clean_one(path, dedupe="first"):
+    # cleans one table, turning any failure into a summary entry so one bad
+    # table doesn't stop the others
+    name = os.path.split(path)[-1]
+    grb = name.split("_converted_flux")[0]
+    try:
+        df = _read_flux_table(path)
+        n_points = len(df)
+
+        # drop unphysical times
+        time = df["time_sec"].to_numpy(np.float64)
+        physical = np.isfinite(time) & (time > 0)
+        df = df[physical]
+
+        cleaned = dedupe_times(df, dedupe)
+        columns = [c for c in _COLUMNS if c in cleaned] + [
+            c for c in cleaned if c not in _COLUMNS
+        ]
+
+        # written to a temporary file first, so an interrupted run never leaves
+        # a partial table behind
+        suffix = next(s for s in OUTPUT_FORMATS.values() if name.endswith(s))
+        output_format = next(f for f, s in OUTPUT_FORMATS.items() if s == suffix)
+        output = path[: -len(suffix)] + "_cleaned" + suffix
+        tmp_path = f"{output}.{os.getpid()}.tmp"
+        try:
+            with _open_writer(tmp_path, output_format, columns) as out:
+                out.write(cleaned[columns])
+            os.replace(tmp_path, output)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return {
+            "GRB": grb,
+            "path": path,
+            "output": output,
+            "points": n_points,
+            "unphysical": int(n_points - physical.sum()),
+            "duplicates": int(len(df) - len(cleaned)),
+            "kept": len(cleaned),
+        }
+    except Exception as error:
+        return {"GRB": grb, "path": path, "error": f"{type(error).__name__}: {error}"}
+
+
+def _clean_many(paths, dedupe="first", n_workers=1):
+    # yields summary entries as tables finish cleaning
+    if n_workers is None or n_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures import as_completed
+
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [pool.submit(_clean_one, path, dedupe) for path in paths]
+            for future in as_completed(futures):
+                yield future.result()
+    else:
+        for path in paths:
+            yield _clean_one(path, dedupe)
@@ -1,7 +1,5 @@
 import os
 
-import pandas as pd
-
 photometry = {
     # The usual Landolt UBVRI & UKIRT JHK system
     # from Bessell et al. (1998)http://www.astronomy.ohio-state.edu/~martini/usefuldata.html
@@ -42,6 +40,19 @@ photometry = {
 table_path = os.path.join(
     os.path.dirname(os.path.realpath(__file__)), "SF11_conversions.txt"
 )
-ebv2A_b_df = pd.read_table(table_path, comment="#", index_col=0)
 
 __all__ = ["photometry", "ebv2A_b_df"]
+
+
+# `ebv2A_b_df` (A_b / E(B-V) from Schlafly & Finkbeiner (2011), by bandpass and R_V)
+# is only read from SF11_conversions.txt the first time it's accessed (PEP 562)
+def __getattr__(name):
+    if name == "ebv2A_b_df":
+        import pandas as pd
+
+        value = pd.read_table(table_path, comment="#", index_col=0)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
@@ -1,17 +1,48 @@
+import hashlib
+import json
 import os.path
-import re
-from functools import reduce
+import sqlite3
+import warnings
 
 import astropy.units as u
-import glob2
 import numpy as np
 from astropy.time import Time
 from pandas import DataFrame
 from pandas import read_csv
 
-from .constants import ebv2A_b_df
+from . import constants
+from .bands import UNSUPPORTED
+from .bands import band_code
+from .bands import band_codes
+from .bands import get_band_table
+from .bands import normalize_band
+from .catalog import get_grb_catalog
 from .constants import photometry
+from .dirindex import get_directory_index
+from .resolver import get_position_resolver
+from ..util import COMPRESSED_SUFFIXES
 from ..util import get_dir
+from ..util import import_pyarrow
+from ..util import set_dir
+from ..util import open_text
+from ..util import str_array
+from ..util import strip_compression
+
+# R band wavelength [angstrom] and frequency [Hz], which all fluxes are normalized to
+_lambda_R = photometry["R"][0]
+_nu_R = (_lambda_R * u.AA).to(u.Hz, equivalencies=u.spectral()).value
+
+# A_b / E(B-V) for R_V = 3.1 from Schlafly & Finkbeiner (2011), keyed by bandpass.
+# read from SF11_conversions.txt the first time it's needed
+_sf11_factors = None
+
+
+def __getattr__(name):
+    # `ebv2A_b_df` is only loaded when it's first used (PEP 562)
+    if name == "ebv2A_b_df":
+        return constants.ebv2A_b_df
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def ebv2A_b(grb: str, bandpass: str, ra="", dec=""):
     r"""A function that returns the galactic extinction correction
@@ -40,43 +71,78 @@ def ebv2A_b(grb: str, bandpass: str, ra="", dec=""):
 
     Raises
     ------
-    astroquery.exceptions.RemoteServiceError
-        If the GRB position cannot be found with `astroquery`, then
-        the user is prompted to enter the RA and DEC manually.
+    LookupError
+        If RA and DEC aren't given and the GRB position cannot be found
+        (see `PositionResolver`), then the user is prompted to enter the
+        RA and DEC manually.
     """
 
-    from astropy.coordinates import SkyCoord
+    global _sf11_factors
 
-    from .sfd import SFDQuery
+    # this factor is A_b / E(B-V)
+    if _sf11_factors is None:
+        _sf11_factors = constants.ebv2A_b_df["3.1"].to_dict()
+    factor = _sf11_factors[bandpass]
 
-    sfd = SFDQuery()
+    a_b = _ebv(grb, ra, dec) * factor
 
-    if not (ra or dec):
-        import astroquery.exceptions
-        from astroquery.simbad import Simbad
+    return a_b  # [mag]
 
-        try:
-            obj = Simbad.query_object(f"GRB {grb}")
-            skycoord = SkyCoord(
-                "{} {}".format(obj["RA"][0], obj["DEC"][0]), unit=(u.hourangle, u.deg)
-            )
-        except astroquery.exceptions.RemoteServiceError:
-            raise astroquery.exceptions.RemoteServiceError(
-                f"Couldn't find the position of GRB {grb}. Please supply RA and DEC manually."
-            )
+
+# E(B-V) at the position of a GRB, or at the given RA and DEC
+def _ebv(grb, ra="", dec=""):
+    from astropy.coordinates import Angle
+
+    from .cache import get_extinction_cache
+    from .sfd import get_sfd_query
+    from .sfd import sfd_map_id
+
+    if not (ra or dec):
+        # checks grb_attrs.txt and the local cache before asking Simbad,
+        # and never asks about the same GRB twice
+        ra_deg, dec_deg = get_position_resolver().resolve(grb)
     else:
-        skycoord = SkyCoord(f"{ra} {dec}", frame="icrs", unit=(u.hourangle, u.deg))
+        # the map is queried with plain degrees, so no SkyCoord has to be built
+        ra_deg = Angle(ra, unit=u.hourangle).deg
+        dec_deg = Angle(dec, unit=u.deg).deg
 
     # this grabs the degree of reddening E(B-V) at the given position in the sky.
     # see https://astronomy.swin.edu.au/cosmos/i/interstellar+reddening for an explanation of what this is
-    ebv = sfd(skycoord)
+    # values are cached on disk, so the map is only read for positions not seen before
+    # a cache that can't be used (read-only install, locked database, ...) is
+    # skipped rather than stopping the conversion
+    cache = get_extinction_cache()
+    map_id = sfd_map_id()
+    try:
+        ebv = cache.get(ra_deg, dec_deg, map_id)
+    except sqlite3.Error as error:
+        _cache_error(cache, error)
+        ebv = None
 
-    # this factor is A_b / E(B-V)
-    factor = ebv2A_b_df["3.1"][bandpass]
+    if ebv is None:
+        # the map is loaded once per process and shared by all lookups
+        ebv = get_sfd_query().query_equ_array(ra_deg, dec_deg)
+        try:
+            cache.put(ra_deg, dec_deg, ebv, map_id)
+        except sqlite3.Error as error:
+            _cache_error(cache, error)
 
-    a_b = ebv * factor
+    return float(ebv)
+
+
+def _cache_error(cache, error):
+    # reported once per process, not once per lookup
+    global _cache_error_reported
+    if not _cache_error_reported:
+        print(
+            f"Couldn't use the extinction cache at {cache.path} ({error}). "
+            "Querying the dust map directly."
+        )
+        _cache_error_reported = True
+
+
+_cache_error_reported = False
 
-    return a_b  # [mag]
 
 @np.vectorize
 def toFlux(
@@ -161,21 +227,16 @@ def toFlux(
     # assert bool(A_b != 0) ^ bool(grb) ^ bool(ra and dec), "Must provide either A_b or grb or ra, dec"
     _check_dust_maps()
 
-    band = re.sub(r"(\'|_|\\|\(.+\))", "", band)
-    band = re.sub(r"(?<![A-Za-z])([mw]\d)", r"uv\1", band)
-    if source == "uvot":
-        band += "_swift"
-    band = band if band != "v" else "V"
-
     # determine index type for conversion of f_nu to R band
     # $\beta = \Gamma - 1$
     beta = photon_index - 1
 
-    try:
-        lambda_R, *__ = photometry["R"]  # lambda_R in angstrom
-        lambda_x, f_x, bandpass_for_ebv = photometry[band]
-    except KeyError:
-        raise KeyError(f"Band '{band}' is not currently supported.")
+    code = band_code(band, source)
+    if code == UNSUPPORTED:
+        raise KeyError(f"Band '{normalize_band(band, source)}' is not currently supported.")
+    lambda_R = _lambda_R  # lambda_R in angstrom
+    row = get_band_table()[code]
+    lambda_x, f_x, bandpass_for_ebv = row["wavelength"], row["zero_point"], str(row["bandpass"])
 
     # get correction for galactic extinction to be added to magnitude if not already supplied
     if A_b == None:
@@ -201,6 +262,255 @@ def toFlux(
     return flux, fluxerr
 
 
+def toFluxArray(
+    band,
+    mag,
+    magerr=0,
+    photon_index=1,
+    photon_index_err=0,
+    A_b=None,
+    grb: str = None,
+    ra: str = None,
+    dec: str = None,
+    source="manual",
+    codes=None,
+):
+    r"""
+        Array version of :py:func:`toFlux`, converting whole columns of magnitudes
+        to fluxes at once.
+
+        Each distinct band is normalized and looked up once, and the flux and flux
+        error of every point are computed in a single NumPy pass. The result is
+        the same as calling :py:func:`toFlux` on every element.
+
+    Parameters
+    ----------
+    band : array_like of str
+        Photometric bandpass of each magnitude.
+    mag : array_like
+        Magnitudes to convert to flux.
+    magerr, photon_index, photon_index_err : array_like, optional
+        As in :py:func:`toFlux`; scalars are broadcast against ``mag``.
+    A_b : array_like, optional
+        Galactic extinction to add onto the magnitudes. If not provided, E(B-V)
+        is looked up once for the position given by ``grb`` or ``ra`` and
+        ``dec``, and scaled to each band.
+    grb, ra, dec : str, optional
+        GRB name and position used to look up extinction. A single position is
+        used for the whole column.
+    source : str or array_like of str, optional
+        Source of the datapoints, by default "manual"
+    codes : array_like of int, optional
+        Band codes of ``band`` (see :py:func:`grblc.convert.bands.band_codes`),
+        if they are already known, so the bands aren't looked up again.
+
+    Returns
+    -------
+    numpy.ndarray, numpy.ndarray
+        flux and flux error in erg cm$^{-2}$ s$^{-1}$ normalized to the R band.
+
+    Raises
+    ------
+    KeyError
+        If any bandpass is not found in :py:data:`grblc.constants.photometry`.
+    """
+    band, source, mag, magerr, photon_index, photon_index_err = np.broadcast_arrays(
+        np.asarray(band, dtype=str),
+        np.asarray(source, dtype=str),
+        np.asarray(mag, dtype=np.float64),
+        np.asarray(magerr, dtype=np.float64),
+        np.asarray(photon_index, dtype=np.float64),
+        np.asarray(photon_index_err, dtype=np.float64),
+    )
+
+    lambda_x, f_x, A_b = _band_columns(band, source, A_b, grb, ra, dec, codes)
+
+    # determine index type for conversion of f_nu to R band
+    # $\beta = \Gamma - 1$
+    beta = photon_index - 1
+
+    # convert from flux density in another band to R!
+    f_R = f_x * (lambda_x / _lambda_R) ** (-beta)
+
+    flux = _nu_R * f_R * 10 ** (-(mag + A_b) / 2.5)
+
+    # see https://youngsam.me/files/error_prop.pdf for derivation
+    fluxerr = np.abs(flux) * np.sqrt(
+        (magerr * np.log(10 ** (0.4))) ** 2 +
+        (photon_index_err * np.log(lambda_x / _lambda_R)) ** 2
+    )
+
+    assert np.all(flux >= 0), "Error computing flux."
+    assert np.all(fluxerr >= 0), "Error computing flux error."
+    return flux, fluxerr
+
+
+def toFluxMC(
+    band,
+    mag,
+    magerr=0,
+    photon_index=1,
+    photon_index_err=0,
+    A_b=None,
+    ebv_rel_err=0,
+    grb: str = None,
+    ra: str = None,
+    dec: str = None,
+    source="manual",
+    n_samples: int = 1000,
+    percentiles=(15.865, 50, 84.135),
+    seed=None,
+    max_samples: int = 1 << 20,
+):
+    r"""
+        Monte Carlo version of :py:func:`toFluxArray`, for errors too large or
+        too correlated for linear error propagation.
+
+        For every point, ``n_samples`` values of the magnitude, photon index and
+        extinction are drawn from normal distributions, converted to flux as
+        one 2-D array, and summarized by percentiles of the resulting flux
+        distribution, so the errors can be asymmetric. Rows are converted in
+        chunks of at most ``max_samples`` samples, so memory use doesn't grow
+        with the number of points.
+
+    Parameters
+    ----------
+    band, mag, magerr, photon_index, photon_index_err, A_b, grb, ra, dec, source
+        As in :py:func:`toFluxArray`.
+    ebv_rel_err : float or array_like, optional
+        Fractional error on E(B-V), and so on the extinction, by default 0
+    n_samples : int, optional
+        Number of samples drawn per point, by default 1000
+    percentiles : tuple of float, optional
+        Lower, central and upper percentiles of the flux samples, by default
+        the median and 1-sigma equivalent percentiles.
+    seed : int or numpy.random.Generator, optional
+        Seed or generator for the samples, by default None (unpredictable).
+    max_samples : int, optional
+        Maximum number of samples per point times points converted at once, by
+        default 2**20 (8 MiB per array of samples).
+
+    Returns
+    -------
+    numpy.ndarray, numpy.ndarray, numpy.ndarray
+        Central flux, lower error and upper error in erg cm$^{-2}$ s$^{-1}$
+        normalized to the R band, where the errors are the distances from the
+        central flux to the lower and upper percentiles.
+
+    Raises
+    ------
+    KeyError
+        If any bandpass is not found in :py:data:`grblc.constants.photometry`.
+    ValueError
+        If ``n_samples`` or ``max_samples`` isn't a positive integer.
+    """
+    for name, value in (("n_samples", n_samples), ("max_samples", max_samples)):
+        if not (np.ndim(value) == 0 and float(value).is_integer() and value >= 1):
+            raise ValueError(f"{name} must be a positive integer, not {value!r}.")
+
+    band, source, mag, magerr, photon_index, photon_index_err, ebv_rel_err = np.broadcast_arrays(
+        np.asarray(band, dtype=str),
+        np.asarray(source, dtype=str),
+        np.asarray(mag, dtype=np.float64),
+        np.asarray(magerr, dtype=np.float64),
+        np.asarray(photon_index, dtype=np.float64),
+        np.asarray(photon_index_err, dtype=np.float64),
+        np.asarray(ebv_rel_err, dtype=np.float64),
+    )
+    shape = band.shape
+    lambda_x, f_x, A_b = _band_columns(band, source, A_b, grb, ra, dec)
+    A_b = np.broadcast_to(A_b, shape)
+
+    rng = np.random.default_rng(seed)
+    n_samples = int(n_samples)
+    rows = max(1, int(max_samples) // n_samples)
+
+    n = band.size
+    out = np.empty((3, n), dtype=np.float64)
+    for start in range(0, n, rows):
+        chunk = slice(start, min(start + rows, n))
+
+        def column(x):
+            return x.ravel()[chunk, None]
+
+        # one row of samples per point. each point's draws are contiguous, so
+        # the samples don't depend on how the rows are chunked
+        # the draws are turned into samples in place to keep memory down
+        z = rng.standard_normal((chunk.stop - chunk.start, 3, n_samples))
+        mag_s, beta_s, A_b_s = z[:, 0], z[:, 1], z[:, 2]
+        mag_s *= column(magerr)
+        mag_s += column(mag)
+        beta_s *= column(photon_index_err)
+        beta_s += column(photon_index) - 1
+        A_b_s *= column(ebv_rel_err)
+        A_b_s += 1
+        A_b_s *= column(A_b)
+
+        # the same conversion as toFluxArray, for every sample
+        f_R = column(f_x) * (column(lambda_x) / _lambda_R) ** (-beta_s)
+        mag_s += A_b_s
+        f_R *= 10 ** (-mag_s / 2.5)
+        f_R *= _nu_R
+        flux_s = f_R
+
+        out[:, chunk] = np.percentile(flux_s, percentiles, axis=1)
+
+    low, flux, high = (p.reshape(shape) for p in out)
+    return flux, flux - low, high - flux
+
+
+# band metadata (wavelength, zero point) and extinction of every element of `band`
+def _band_columns(band, source, A_b, grb, ra, dec, codes=None):
+    if codes is None or (np.asarray(codes) == UNSUPPORTED).any():
+        codes, unsupported = _lookup_bands(band, source)
+        if unsupported:
+            raise KeyError(f"Band '{unsupported[0]}' is not currently supported.")
+    codes = np.broadcast_to(codes, np.shape(band))
+
+    # band metadata for the whole column, by band code
+    table = get_band_table()
+    lambda_x = table["wavelength"][codes]
+    f_x = table["zero_point"][codes]
+
+    # get correction for galactic extinction to be added to magnitude if not already supplied.
+    # E(B-V) only depends on the position, and A_b / E(B-V) only on the band
+    if A_b is None:
+        _check_dust_maps()
+        sf11 = table["sf11"][codes]
+        if np.isnan(sf11).any():
+            raise KeyError(str(table["bandpass"][codes][np.isnan(sf11)][0]))
+        A_b = _ebv(grb, ra, dec) * sf11
+    else:
+        A_b = np.asarray(A_b, dtype=np.float64)
+
+    return lambda_x, f_x, A_b
+
+
+# returns the band code (see `band_codes`) of every element of `band`, and the
+# normalized names of the unsupported ones
+def _lookup_bands(band, source="manual"):
+    codes = band_codes(band, source)
+
+    unsupported = []
+    missing = codes == UNSUPPORTED
+    if missing.any():
+        band, source = np.broadcast_arrays(
+            np.asarray(band, dtype=object), np.asarray(source, dtype=object)
+        )
+        pairs = dict.fromkeys(zip(band[missing].tolist(), source[missing].tolist()))
+        unsupported = list(dict.fromkeys(normalize_band(str(b), str(s)) for b, s in pairs))
+
+    return codes, unsupported
+
+
+class GRBNotFound(ImportError):
+    """Raised when a GRB's magnitude table or catalog entry can't be found.
+
+    It's an `ImportError`, like the errors `convertGRB` raised for these
+    cases before, so existing handlers keep working.
+    """
+
+
 # main conversion function to call
 def convertGRB(
     GRB: str,
@@ -210,7 +520,69 @@ def convertGRB(
     use_nick: bool = False,
     ftol=None,
     debug: bool = False,
+    verbose: bool = True,
+    skip_unchanged: bool = False,
+    chunksize: int = None,
+    output_format: str = "txt",
 ):
+    """Converts the magnitude table of a GRB to flux and writes it next to the table.
+
+    Parameters
+    ----------
+    GRB : str
+        GRB name. The table ``<GRB>_magnitude.txt`` (possibly compressed) is
+        looked for anywhere in `get_dir()`.
+    battime : str, optional
+        Trigger time, by default taken from the GRB catalog.
+    index : float, optional
+        Photon index, by default taken from the GRB catalog.
+    index_err : float, optional
+        Photon index error, by default taken from the GRB catalog.
+    use_nick : bool, optional
+        Whether the table has a leading nickname column, by default False.
+    ftol : float, optional
+        Points with a fractional flux error above this are dropped, by default None.
+    debug : bool, optional
+        Also write magnitudes and log values, by default False.
+    verbose : bool, optional
+        Print unsupported bands, by default True.
+    skip_unchanged : bool, optional
+        Don't reconvert if the output's manifest (``<output>.manifest.json``)
+        shows it was made from the same table, GRB attributes, conversion
+        constants and options, by default False.
+    chunksize : int, optional
+        Convert the table this many rows at a time, appending each chunk to
+        the output as it's done, so memory use doesn't grow with the size of
+        the table. By default the whole table is converted at once.
+    output_format : str, optional
+        Format of the output table: "txt" (tab-separated text, the default),
+        "parquet", or "feather" (Arrow IPC). The columnar formats store typed
+        ``time_sec``, ``flux`` and ``flux_err`` (float64) and ``band``
+        (string) columns, and require the optional ``pyarrow`` package.
+
+    Returns
+    -------
+    dict
+        Summary of the conversion: ``GRB``, ``path`` of the output, number of
+        ``points`` in the table, ``converted`` and ``skipped`` points, the
+        ``unsupported_bands`` found, and whether the output was ``unchanged``
+        (i.e., not reconverted).
+
+    Raises
+    ------
+    GRBNotFound
+        If the table or the GRB's attributes can't be found.
+    ValueError
+        If ``output_format`` isn't supported.
+    """
+    try:
+        output_suffix = OUTPUT_FORMATS[output_format]
+    except KeyError:
+        raise ValueError(
+            f"Output format '{output_format}' isn't supported. "
+            f"Use one of {', '.join(OUTPUT_FORMATS)}."
+        )
+
     # make sure we have dust maps downloaded for calculating galactic extinction
     _check_dust_maps()
 
@@ -236,24 +608,19 @@ def convertGRB(
     | nickname | date | time | exp | mag | mag_err | band |
     """
 
-    # try to import magnitude table to convert
     try:
-        global directory
-        glob_path = reduce(os.path.join, (directory, "**", f"{GRB}_magnitude.txt"))
-        filename, *__ = glob2.glob(glob_path)
-        mag_table = read_csv(
-            filename,
-            delimiter=r"\t+|\s+",
-            names=names,
-            dtype=dtype,
-            skiprows=1,
-            engine="python",
-        )
-
-    except ValueError as error:
-        raise error
+        filename = _find_magnitude_table(GRB)
     except IndexError:
-        raise ImportError(message=f"Couldn't find GRB table at {filename}.")
+        raise GRBNotFound(f"Couldn't find GRB table for {GRB} in {get_dir()}.")
+
+    if not debug:
+        save_path = os.path.join(
+            os.path.dirname(filename), f"{GRB}_converted_flux{output_suffix}"
+        )
+    else:
+        save_path = os.path.join(
+            os.path.dirname(filename), f"{GRB}_converted_flux_DEBUG{output_suffix}"
+        )
 
     # grab photon index and trigger time
     if battime and index:
@@ -262,164 +629,541 @@ def convertGRB(
         photon_index_err = index_err
         ra, dec = "", ""
     else:
+        # attributes come from grb_attrs.txt, which is only parsed once per process
+        catalog = get_grb_catalog()
         try:
-            bat_spec_df = read_csv(
-                os.path.join(os.path.dirname(__file__), "grb_attrs.txt"),
-                delimiter="\t+|\\s+",
-                index_col=0,
-                header=0,
-                engine="python",
-            )
-            bat_spec_df["photon_index"] = bat_spec_df["photon_index"].astype(np.float64)
-            bat_spec_df["photon_index_err"] = bat_spec_df["photon_index_err"].astype(
-                np.float64
-            )
-            bat_spec_df.dropna(
-                how="any", subset=["photon_index", "photon_index_err"], inplace=True
-            )
-            photon_index, photon_index_err = bat_spec_df.loc[
-                GRB, ["photon_index", "photon_index_err"]
-            ]
-            battime = list(bat_spec_df.loc[GRB, ["trigger_date", "trigger_time"]])
-            ra, dec = bat_spec_df.loc[GRB, ["ra", "dec"]]
-            battime = " ".join(battime)
-            starttime = Time(battime)
-
+            photon_index, photon_index_err = catalog.photon_index_of(GRB)
+            starttime = Time(catalog.trigger_of(GRB))
         except KeyError:
-            raise ImportError(
+            raise GRBNotFound(
                 f"{GRB} isn't in our database and it's trigger time" \
                  " and photon index must be manually provided."
             )
+        # ebv2A_b takes the position from the same catalog
+        ra, dec = "", ""
+
+    # tables are only reconverted if they, the GRB's attributes and position, the
+    # conversion constants or the options changed since the last conversion
+    manifest = _conversion_manifest(
+        GRB, filename, battime, index, index_err, use_nick, ftol, debug, output_format
+    )
+    if skip_unchanged:
+        summary = _unchanged_summary(save_path, manifest)
+        if summary is not None:
+            return summary
 
-    converted = {k: [] for k in ("time_sec", "flux", "flux_err", "band")}
+    columns = ["time_sec", "flux", "flux_err", "band"]
     if debug:
-        converted_debug = {
-            k: []
-            for k in (
-                "time_sec",
-                "flux",
-                "flux_err",
-                "band",
-                "logF",
-                "logT",
-                "mag",
-                "mag_err",
+        columns += ["logF", "logT", "mag", "mag_err"]
+
+    # import magnitude table to convert. compressed tables
+    # (e.g., <GRB>_magnitude.txt.gz) are decompressed as they are read, and
+    # with a chunksize only one chunk of the table is in memory at a time.
+    # the output is written to a temporary file first, so an interrupted
+    # conversion never leaves a partial table behind.
+    tmp_path = f"{save_path}.{os.getpid()}.tmp"
+    n_points = 0
+    n_converted = 0
+    unsupported = {}
+    try:
+        with open_text(filename) as f, _open_writer(tmp_path, output_format, columns) as out:
+            chunks = read_csv(
+                f,
+                sep=r"\s+",
+                names=names,
+                dtype=dtype,
+                skiprows=1,
+                chunksize=chunksize,
             )
-        }
+            if chunksize is None:
+                chunks = [chunks]
 
-    for __, row in mag_table.iterrows():
-        band = row["band"]
-        magnitude = row["mag"]
-        mag_err = row["mag_err"]
+            for mag_table in chunks:
+                converted, chunk_unsupported = _convert_chunk(
+                    mag_table, starttime, photon_index, photon_index_err,
+                    GRB, ra, dec, ftol, debug,
+                )
+                for band in chunk_unsupported:
+                    if band not in unsupported and verbose:
+                        print(KeyError(f"Band '{band}' is not currently supported."))
+                    unsupported[band] = None
 
-        # attempt to convert a single magnitude to flux given a band, position in the sky, mag_err, and photon index
-        try:
-            flux, flux_err = toFlux(
-                band,
-                magnitude,
-                mag_err,
-                photon_index,
-                photon_index_err,
-                grb=GRB,
-                ra=ra,
-                dec=dec,
-            )
-        except KeyError as error:
-            print(error)
-            continue
-
-        if ftol is not None and flux_err/flux > ftol:
-            continue
-
-        # convert UT to a time delta since trigger time
-        date_UT = row["date"]
-        time_UT = row["time"]
-        time_UT = f"{date_UT} {time_UT}"
-        astrotime = Time(time_UT, format="iso")  # using astropy Time package
-        dt = astrotime - starttime  # for all other times, subtract start time
-        time_sec = round(dt.sec, 5)  # convert delta time to seconds
-
-        converted["time_sec"].append(time_sec)
-        converted["flux"].append(flux)
-        converted["flux_err"].append(flux_err)
-        converted["band"].append(band)
-
-        # verbosity if you want it
-        if debug:
-            logF = np.log10(flux)
-            logT = np.log10(time_sec)
-            converted_debug["time_sec"].append(time_sec)
-            converted_debug["flux"].append(flux)
-            converted_debug["flux_err"].append(flux_err)
-            converted_debug["band"].append(band)
-            converted_debug["logF"].append(logF)
-            converted_debug["logT"].append(logT)
-            converted_debug["mag"].append(magnitude)
-            converted_debug["mag_err"].append(mag_err)
-
-    # after converting everything, go from dictionary -> DataFrame -> csv!
-    if not debug:
-        save_path = os.path.join(os.path.dirname(filename), f"{GRB}_converted_flux.txt")
-        DataFrame.from_dict(converted).to_csv(save_path, sep="\t", index=False)
-    else:
-        save_path = os.path.join(
-            os.path.dirname(filename), f"{GRB}_converted_flux_DEBUG.txt"
+                # after converting a chunk, go from dictionary -> DataFrame -> output!
+                out.write(DataFrame(converted, columns=columns))
+                n_points += len(mag_table)
+                n_converted += len(converted["time_sec"])
+
+        os.replace(tmp_path, save_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    summary = {
+        "GRB": GRB,
+        "path": save_path,
+        "points": n_points,
+        "converted": n_converted,
+        "skipped": n_points - n_converted,
+        "unsupported_bands": list(unsupported),
+    }
+    _write_manifest(save_path, manifest, summary)
+
+    return dict(summary, unchanged=False)
+
+
+# converts one chunk of a magnitude table, returning the output columns and the
+# unsupported bands that were dropped
+def _convert_chunk(
+    mag_table, starttime, photon_index, photon_index_err, GRB, ra, dec, ftol, debug
+):
+    if not len(mag_table):
+        return _empty_chunk(debug), []
+
+    # unsupported bands are reported and skipped
+    bands = str_array(mag_table["band"])
+    codes, unsupported = _lookup_bands(bands)
+    supported = codes != UNSUPPORTED
+    if not supported.any():
+        # nothing to convert, so no extinction to look up either
+        return _empty_chunk(debug), unsupported
+    mag_table = mag_table[supported]
+    bands = bands[supported]
+
+    # convert all magnitudes to flux given their bands, position in the sky, mag_err, and photon index
+    fluxes, flux_errs = toFluxArray(
+        bands,
+        mag_table["mag"].to_numpy(),
+        mag_table["mag_err"].to_numpy(),
+        photon_index,
+        photon_index_err,
+        grb=GRB,
+        ra=ra,
+        dec=dec,
+        codes=codes[supported],
+    )
+
+    # convert UT to a time delta since trigger time, parsing the whole column at once
+    time_UT = str_array(mag_table["date"] + " " + mag_table["time"])
+    astrotime = Time(time_UT, format="iso")  # using astropy Time package
+    dt = astrotime - starttime  # for all other times, subtract start time
+    time_sec = np.round(dt.sec, 5)  # convert delta time to seconds
+
+    keep = np.ones(len(mag_table), dtype=bool)
+    if ftol is not None:
+        keep = ~(flux_errs / fluxes > ftol)
+
+    converted = {
+        "time_sec": time_sec[keep],
+        "flux": fluxes[keep],
+        "flux_err": flux_errs[keep],
+        "band": mag_table["band"].to_numpy()[keep],
+    }
+
+    # verbosity if you want it
+    if debug:
+        converted["logF"] = np.log10(converted["flux"])
+        converted["logT"] = np.log10(converted["time_sec"])
+        converted["mag"] = mag_table["mag"].to_numpy()[keep]
+        converted["mag_err"] = mag_table["mag_err"].to_numpy()[keep]
+
+    return converted, unsupported
+
+
+def _empty_chunk(debug):
+    # output columns of a chunk with no convertible points
+    columns = ["time_sec", "flux", "flux_err"]
+    if debug:
+        columns += ["logF", "logT", "mag", "mag_err"]
+    converted = {column: np.empty(0) for column in columns}
+    converted["band"] = np.empty(0, dtype=object)
+    return converted
+
+
+# file extension of each output format of convertGRB
+OUTPUT_FORMATS = {"txt": ".txt", "parquet": ".parquet", "feather": ".feather"}
+
+
+class _TableWriter:
+    # appends DataFrame chunks to an output table
+
+    def write(self, df):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _TextWriter(_TableWriter):
+    # appends DataFrame chunks to a tab-separated table
+
+    def __init__(self, path, columns):
+        self._f = open(path, "w", newline="")
+        self._columns = columns
+        self._header = True
+
+    def write(self, df):
+        df.to_csv(self._f, sep="\t", index=False, header=self._header)
+        self._header = False
+
+    def close(self):
+        if self._header:
+            # empty table
+            self.write(DataFrame(columns=self._columns))
+        self._f.close()
+
+
+class _ColumnarWriter(_TableWriter):
+    # appends DataFrame chunks to a Parquet file (one row group per chunk) or a
+    # Feather/Arrow IPC file (one record batch per chunk), with typed columns
+
+    def __init__(self, path, output_format, columns):
+        pa = import_pyarrow()
+        self._pa = pa
+        self._schema = pa.schema(
+            [(c, pa.string() if c == "band" else pa.float64()) for c in columns]
         )
-        DataFrame.from_dict(converted_debug).to_csv(save_path, sep="\t", index=False)
+        if output_format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def write(self, df):
+        table = self._pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+
+def _open_writer(path, output_format, columns):
+    if output_format == "txt":
+        return _TextWriter(path, columns)
+    return _ColumnarWriter(path, output_format, columns)
 
 
 # Converts all magnitude tables that are in the path format of
 # get_dir()/*_flux/<GRB>.txt
-def convert_all(debug=False):
+def convert_all(
+    debug=False, n_workers=1, resume=False, force=False, chunksize=None, output_format="txt"
+):
+    """Converts every magnitude table in `get_dir()`, optionally in parallel.
+
+    Each GRB's outcome is collected into a report, which is written to
+    ``convert_report.tsv`` in `get_dir()` (with the names of unsupported GRBs
+    also written to ``unsupported.txt``). GRBs are appended to the checkpoint
+    file ``convert_all.checkpoint`` as they are converted, so an interrupted
+    run can be continued with ``resume=True``.
+
+    Parameters
+    ----------
+    debug : bool, optional
+        Passed on to `convertGRB`, by default False.
+    n_workers : int, optional
+        Number of worker processes, by default 1, which converts in this
+        process. Each worker loads the GRB catalog and the dust map once.
+    resume : bool, optional
+        Skip GRBs listed in the checkpoint file of a previous run, by default
+        False, which starts a new checkpoint.
+    force : bool, optional
+        Reconvert every table, by default False, which only reconverts tables
+        whose output is missing or stale (see ``skip_unchanged`` in `convertGRB`).
+    chunksize : int, optional
+        Stream each table in chunks of this many rows (see `convertGRB`), by
+        default None, which converts each table at once.
+    output_format : str, optional
+        Format of the converted tables (see `convertGRB`), by default "txt".
+
+    Returns
+    -------
+    pandas.DataFrame
+        The report, with one row per GRB: ``GRB``, ``status`` (one of
+        converted, unchanged, unsupported, error or checkpoint), ``points``,
+        ``converted`` and ``skipped`` points, ``unsupported_bands``, and the
+        ``error`` message, if any.
+    """
     # grab all filepaths for LCs in magnitude
-    filepaths = glob2.glob(reduce(os.path.join, (get_dir(), "*_flux", "*.txt")))
+    index = get_directory_index()
+    index.refresh()
+    filepaths = [
+        f
+        for suffix in ("",) + COMPRESSED_SUFFIXES
+        for f in index.glob(f"*_flux/*.txt{suffix}")
+    ]
     grbs = [
-        os.path.split(f)[1][:-4]
+        _grb_from_table(f)
         for f in filepaths
         if os.path.split(f)[1].count("flux") == 0
         and "trigger" not in f
         and "spectral_index" not in f
     ]
+    grbs = list(dict.fromkeys(grbs))
 
-    converted = []
-    unsupported = 0
-    unsupported_names = []
-    pts_skipped = 0
-    for GRB in grbs:
-        try:
-            convertGRB(GRB, debug=debug)
-            converted.append(GRB)
-        except ImportError as error:
-            unsupported += 1
-            unsupported_names.append(GRB)
-            print(error)
-            pass
-        except KeyError as error:
-            pts_skipped += 1
-            print(str(error).strip('"'))
-            pass
-        except Exception as error:
-            print(GRB)
-            raise error
+    checkpoint_path = os.path.join(get_dir(), _CHECKPOINT_FILENAME)
+    done = set()
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            done = set(f.read().split())
+    elif os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    report = [_report_row(GRB, "checkpoint") for GRB in grbs if GRB in done]
+    todo = [GRB for GRB in grbs if GRB not in done]
+
+    # download the dust maps once, before any worker needs them
+    _check_dust_maps()
+    # and look up the positions that aren't known yet in one batched query.
+    # workers find them (or that they couldn't be found) in the persistent cache
+    _resolve_positions(todo)
+
+    with open(checkpoint_path, "a") as checkpoint:
+        for row in _convert_many(
+            todo,
+            n_workers,
+            debug=debug,
+            skip_unchanged=not force,
+            chunksize=chunksize,
+            output_format=output_format,
+        ):
+            report.append(row)
+            if row["status"] in ("converted", "unchanged"):
+                checkpoint.write(row["GRB"] + "\n")
+                checkpoint.flush()
 
+    report = DataFrame(report, columns=_REPORT_COLUMNS)
+    report.to_csv(os.path.join(get_dir(), "convert_report.tsv"), sep="\t", index=False)
+
+    counts = report["status"].value_counts()
     print(
         "\n" + "=" * 30 + "\nStats\nUnsupported:",
-        unsupported,
+        counts.get("unsupported", 0),
+        "\nErrors:",
+        counts.get("error", 0),
         "\nTotal:",
         len(grbs),
         "\nSuccessfully Converted:",
-        len(converted),
+        counts.get("converted", 0),
+        "\nUnchanged:",
+        counts.get("unchanged", 0) + counts.get("checkpoint", 0),
         "\nPoints skipped",
-        pts_skipped,
+        report["skipped"].sum(),
     )
 
     with open(os.path.join(get_dir(), "unsupported.txt"), "w") as f:
-        f.write("\n".join(unsupported_names))
+        f.write("\n".join(report.loc[report["status"] == "unsupported", "GRB"]))
+
+    return report
+
+
+_CHECKPOINT_FILENAME = "convert_all.checkpoint"
+_REPORT_COLUMNS = [
+    "GRB",
+    "status",
+    "points",
+    "converted",
+    "skipped",
+    "unsupported_bands",
+    "error",
+]
+
+
+def _resolve_positions(grbs):
+    # only catalogued GRBs are converted, so the others aren't looked up
+    catalog = get_grb_catalog()
+    try:
+        get_position_resolver().resolve_many(GRB for GRB in grbs if GRB in catalog)
+    except Exception as error:
+        print(f"Couldn't look up GRB positions: {type(error).__name__}: {error}")
+
+
+def _grb_from_table(path):
+    # <GRB>_magnitude.txt[.gz] -> <GRB>
+    name = strip_compression(os.path.split(path)[1])[:-4]
+    if name.endswith("_magnitude"):
+        name = name[: -len("_magnitude")]
+    return name
+
+
+def _report_row(GRB, status, summary=None, error=""):
+    summary = summary or {}
+    return {
+        "GRB": GRB,
+        "status": status,
+        "points": summary.get("points", 0),
+        "converted": summary.get("converted", 0),
+        "skipped": summary.get("skipped", 0),
+        "unsupported_bands": ",".join(summary.get("unsupported_bands", [])),
+        "error": error,
+    }
+
+
+def _convert_one(GRB, **kwargs):
+    # converts one GRB, turning any failure into a report row so one bad table
+    # doesn't stop the others
+    try:
+        summary = convertGRB(GRB, verbose=False, **kwargs)
+        return _report_row(GRB, "unchanged" if summary["unchanged"] else "converted", summary)
+    except GRBNotFound as error:
+        return _report_row(GRB, "unsupported", error=str(error))
+    except Exception as error:
+        return _report_row(GRB, "error", error=f"{type(error).__name__}: {error}")
+
+
+def _init_worker(directory):
+    # runs once in each worker process, so every conversion in it shares the
+    # catalog and dust map
+    set_dir(directory)
+    get_grb_catalog()
+    _check_dust_maps()
+    if _dust_maps_found:
+        from .sfd import get_sfd_query
+
+        get_sfd_query()
+
+
+def _convert_many(grbs, n_workers=1, **kwargs):
+    # yields report rows as GRBs finish converting, passing kwargs to convertGRB
+    if n_workers is None or n_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures import as_completed
+
+        with ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_init_worker, initargs=(get_dir(),)
+        ) as pool:
+            futures = [pool.submit(_convert_one, GRB, **kwargs) for GRB in grbs]
+            for future in as_completed(futures):
+                yield future.result()
+    else:
+        for GRB in grbs:
+            yield _convert_one(GRB, **kwargs)
+
 
+# finds the (possibly compressed) magnitude table for a GRB somewhere in get_dir()
+def _find_magnitude_table(GRB):
+    name = f"{GRB}_magnitude.txt"
+    filepaths = get_directory_index().find(
+        name, *(name + suffix for suffix in COMPRESSED_SUFFIXES)
+    )
+    if not filepaths:
+        raise IndexError(f"No magnitude table found for {GRB}.")
+
+    # prefer an uncompressed table if both exist
+    filename = min(filepaths, key=lambda p: (p.endswith(COMPRESSED_SUFFIXES), p))
+    directories = sorted({os.path.dirname(p) for p in filepaths})
+    if len(directories) > 1:
+        warnings.warn(
+            f"Magnitude tables for {GRB} were found in several directories "
+            f"({', '.join(directories)}). Using {filename}.",
+            stacklevel=3,
+        )
+    return filename
+
+
+# bump this when a change to the conversion itself should invalidate old outputs
+_CONVERSION_VERSION = 1
+_constants_digest = None
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _json_digest(obj):
+    return hashlib.sha256(
+        json.dumps(obj, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _conversion_constants_digest():
+    # the photometry table and SF11 conversions only change with the package,
+    # so they are hashed once per process
+    global _constants_digest
+    if _constants_digest is None:
+        _constants_digest = _json_digest(
+            [_CONVERSION_VERSION, photometry, _file_digest(constants.table_path)]
+        )
+    return _constants_digest
+
+
+def _conversion_manifest(
+    GRB, filename, battime, index, index_err, use_nick, ftol, debug, output_format="txt"
+):
+    # everything the output of convertGRB depends on
+    from .sfd import sfd_map_id
+
+    if battime and index:
+        attrs = {"battime": battime, "index": index, "index_err": index_err}
+    else:
+        attrs = get_grb_catalog().get(GRB)
+    # extinction is always looked up at the resolved position, which can
+    # change (e.g., a corrected catalog entry) even if the attributes given don't
+    attrs = {"attrs": attrs, "position": get_position_resolver().resolve_many([GRB]).get(GRB)}
+
+    return {
+        "table": os.path.basename(filename),
+        "table_sha256": _file_digest(filename),
+        "attrs_sha256": _json_digest(attrs),
+        "constants_sha256": _conversion_constants_digest(),
+        "dust_map": sfd_map_id(),
+        "options": {
+            "use_nick": use_nick,
+            "ftol": ftol,
+            "debug": debug,
+            "output_format": output_format,
+        },
+    }
+
+
+def _manifest_path(save_path):
+    # one per output, so converting a GRB to several formats keeps them all
+    return save_path + ".manifest.json"
+
+
+def _unchanged_summary(save_path, manifest):
+    # returns the stored summary if save_path is up to date with manifest
+    try:
+        with open(_manifest_path(save_path)) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    summary = previous.pop("summary", None)
+    if summary is None or previous != manifest or not os.path.exists(save_path):
+        return None
+    return dict(summary, unchanged=True)
+
+
+def _write_manifest(save_path, manifest, summary):
+    path = _manifest_path(save_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(dict(manifest, summary=summary), f, indent=2)
+    os.replace(tmp_path, path)
 
-# simple checker that downloads the SFD dust map if it's not already there
+
+# simple checker that downloads the SFD dust map if it's not already there.
+# the check only touches the filesystem until the maps are found once.
 def _check_dust_maps():
+    global _dust_maps_found
+    if _dust_maps_found:
+        return
+
     data_dir = os.path.join(os.path.dirname(__file__), "extinction_maps")
     if not os.path.exists(os.path.join(data_dir, "sfd")):
         from .sfd import sfd
         sfd.fetch()
+    _dust_maps_found = True
+
+
+_dust_maps_found = False
@@ -0,0 +1,195 @@
+import os
+import re
+import threading
+import time
+
+from ..util import get_dir
+
+__all__ = ["DirectoryIndex", "get_directory_index"]
+
+# directories modified this recently are rescanned on every refresh, since a
+# change within the same mtime tick (up to seconds on some network filesystems)
+# wouldn't change their mtime
+_RACY_SECONDS = 2.0
+
+
+def _translate(pattern):
+    # glob pattern -> regex over "/"-separated relative paths, where `*` and `?`
+    # don't cross directories and `**/` matches any number of them (even none)
+    parts = []
+    for token in re.split(r"(\*\*/|\*|\?)", pattern):
+        if token == "**/":
+            parts.append(r"(?:[^/]+/)*")
+        elif token == "*":
+            parts.append(r"[^/]*")
+        elif token == "?":
+            parts.append(r"[^/]")
+        else:
+            parts.append(re.escape(token))
+    return re.compile("".join(parts) + r"\Z")
+
+
+class DirectoryIndex:
+    """An index of every file under a directory, kept up to date by mtime.
+
+    The tree is scanned once, and each `refresh` afterwards only stats the
+    directories, listing again just those whose mtime changed (adding,
+    removing or renaming an entry changes the mtime of its directory). Files
+    can be looked up by name with `find`, or matched with `glob`, without
+    walking the tree. Hidden files and directories are skipped, like `glob`
+    does. Use `get_directory_index` to share one index per directory.
+
+    Parameters
+    ----------
+    root : str
+        Directory to index.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._listings = {}  # relative dir -> (mtime_ns, racy, files, subdirs)
+        self._by_name = {}  # file name -> relative paths
+        self._lock = threading.RLock()
+        self.refresh()
+
+    def _scan(self, rel):
+        files, subdirs = [], []
+        with os.scandir(os.path.join(self.root, rel)) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                (subdirs if is_dir else files).append(entry.name)
+        return tuple(sorted(files)), tuple(sorted(subdirs))
+
+    def refresh(self):
+        """Brings the index up to date with the filesystem.
+
+        Returns
+        -------
+        bool
+            Whether anything was rescanned.
+        """
+        with self._lock:
+            now = time.time()
+            listings = {}
+            changed = False
+            stack = [""]
+            while stack:
+                rel = stack.pop()
+                try:
+                    mtime = os.stat(os.path.join(self.root, rel)).st_mtime_ns
+                    cached = self._listings.get(rel)
+                    if cached is None or cached[0] != mtime or cached[1]:
+                        racy = now - mtime / 1e9 < _RACY_SECONDS
+                        cached = (mtime, racy) + self._scan(rel)
+                        changed = True
+                except OSError:
+                    # removed since its parent was listed
+                    changed = True
+                    continue
+
+                listings[rel] = cached
+                stack.extend(f"{rel}{d}/" for d in cached[3])
+
+            if changed or len(listings) != len(self._listings):
+                by_name = {}
+                for rel, (_, _, files, _) in listings.items():
+                    for name in files:
+                        by_name.setdefault(name, []).append(rel + name)
+                self._by_name = by_name
+            self._listings = listings
+            return changed
+
+    def files(self):
+        """Returns the absolute paths of all indexed files."""
+        with self._lock:
+            return [
+                os.path.join(self.root, path)
+                for paths in self._by_name.values()
+                for path in paths
+            ]
+
+    def glob(self, pattern):
+        """Returns the absolute paths of indexed files matching a glob pattern.
+
+        Parameters
+        ----------
+        pattern : str
+            Pattern relative to the root, with "/" as separator, e.g.
+            ``"*_flux/*.txt"`` or ``"**/*.txt"``.
+
+        Returns
+        -------
+        list of str
+            Matching paths, sorted.
+        """
+        regex = _translate(pattern)
+        with self._lock:
+            return sorted(
+                os.path.join(self.root, path)
+                for paths in self._by_name.values()
+                for path in paths
+                if regex.match(path)
+            )
+
+    def find(self, *names):
+        """Returns the absolute paths of files with any of the given names.
+
+        The index is refreshed first if none are indexed or one of them no
+        longer exists, so a cached lookup only costs a stat per match.
+
+        Parameters
+        ----------
+        *names : str
+            File names, without directories.
+
+        Returns
+        -------
+        list of str
+            Paths of the matching files, sorted.
+        """
+
+        def lookup():
+            return sorted(
+                os.path.join(self.root, path)
+                for name in names
+                for path in self._by_name.get(name, ())
+            )
+
+        with self._lock:
+            paths = lookup()
+            if not paths or not all(os.path.exists(p) for p in paths):
+                self.refresh()
+                paths = lookup()
+            return paths
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_directory_index(root=None):
+    """Returns the process-wide `DirectoryIndex` of a directory.
+
+    The index is built on first use and reused afterwards; call its
+    `DirectoryIndex.refresh` method to pick up changes.
+
+    Parameters
+    ----------
+    root : str, optional
+        Directory to index, by default `get_dir()`.
+
+    Returns
+    -------
+    DirectoryIndex
+        The shared index.
+    """
+    root = os.path.abspath(root if root is not None else get_dir())
+    with _indexes_lock:
+        if root not in _indexes:
+            _indexes[root] = DirectoryIndex(root)
+        return _indexes[root]
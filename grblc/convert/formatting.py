@@ -1,17 +1,15 @@
 import os
 import re
-from functools import reduce
 
-import glob2
-
-from ..util import get_dir
+from .dirindex import get_directory_index
 
 
 def fix_format():
     ff = []
-    glob_path = reduce(os.path.join, [get_dir(), "**","*.txt"])
+    index = get_directory_index()
+    index.refresh()
     grbsearch = re.compile(r"\d{4,7}[A-Z]?")
-    filepaths = [g for g in glob2.glob(glob_path) if "_converted_flux.txt" not in g and grbsearch.search(g)]
+    filepaths = [g for g in index.glob("**/*.txt") if "_converted_flux.txt" not in g and grbsearch.search(g)]
     for line in filepaths:
         grbname = line.split("/")[-1].rstrip(".txt")
         if len(grbname) < 6:
@@ -23,7 +21,8 @@ def fix_format():
         print("The following files were renamed to add the leading zero: " + str(ff))
 
     # Correct \t
-    filepaths = [g for g in glob2.glob(glob_path) if "_converted_flux.txt" not in g and grbsearch.search(g)]
+    index.refresh()
+    filepaths = [g for g in index.glob("**/*.txt") if "_converted_flux.txt" not in g and grbsearch.search(g)]
     for line in filepaths:
         with open(line, "r") as f:
             txt = f.read()
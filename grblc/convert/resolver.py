@@ -0,0 +1,201 @@
+import sqlite3
+import threading
+
+import numpy as np
+
+__all__ = ["PositionResolver", "SimbadBackend", "get_position_resolver"]
+
+
+def _to_degrees(ra, dec):
+    """Returns (ra, dec) in degrees from sexagesimal strings or numbers in degrees."""
+    import astropy.units as u
+    from astropy.coordinates import Angle
+
+    if isinstance(ra, str):
+        return Angle(ra, unit=u.hourangle).deg, Angle(dec, unit=u.deg).deg
+    return float(ra), float(dec)
+
+
+class SimbadBackend:
+    """Resolves GRB positions with Simbad, using one query for any number of names."""
+
+    def resolve(self, names):
+        """Looks up the position of each GRB.
+
+        Parameters
+        ----------
+        names : list of str
+            GRB names, without the "GRB" prefix.
+
+        Returns
+        -------
+        dict
+            ``{name: (ra, dec)}`` in degrees for every name Simbad knows.
+        """
+        from astroquery.simbad import Simbad
+
+        table = Simbad.query_objects([f"GRB {name}" for name in names])
+        if table is None:
+            return {}
+
+        # older versions of astroquery return sexagesimal RA/DEC, newer ones degrees
+        ra_col, dec_col = ("RA", "DEC") if "RA" in table.colnames else ("ra", "dec")
+        if "user_specified_id" in table.colnames:
+            ids = [str(i).replace("GRB", "", 1).strip() for i in table["user_specified_id"]]
+        else:
+            ids = names
+
+        positions = {}
+        for name, ra, dec in zip(ids, table[ra_col], table[dec_col]):
+            if np.ma.is_masked(ra) or np.ma.is_masked(dec) or str(ra).strip() == "":
+                continue
+            positions[name] = _to_degrees(ra, dec)
+        return positions
+
+
+class PositionResolver:
+    """Finds the sky positions of GRBs, only asking a remote service as a last resort.
+
+    Positions are taken, in order, from positions already resolved in this
+    process, from ``grb_attrs.txt``, from the persistent cache, and finally
+    from the remote backend. Names that have to be looked up remotely are
+    sent in a single batch, and every name is looked up at most once per
+    process, whether or not it was found. Names the backend couldn't find
+    are also recorded in the cache, so later runs don't ask about them again
+    (see `ExtinctionCache.clear_missing_positions`). A cache that can't be
+    used is skipped.
+
+    Parameters
+    ----------
+    backend : object, optional
+        Remote lookup service with a ``resolve(names)`` method returning
+        ``{name: (ra, dec)}`` in degrees, by default `SimbadBackend`.
+    cache : ExtinctionCache, optional
+        Persistent cache the resolved positions are stored in, by default the
+        shared cache from `get_extinction_cache`.
+    catalog : GRBCatalog, optional
+        Catalog of GRB attributes, by default the shared catalog from
+        `get_grb_catalog`.
+    """
+
+    def __init__(self, backend=None, cache=None, catalog=None):
+        self.backend = backend if backend is not None else SimbadBackend()
+        self._cache = cache
+        self._catalog = catalog
+        self._positions = {}
+        self._missing = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from .cache import get_extinction_cache
+
+            return get_extinction_cache()
+        return self._cache
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            from .catalog import get_grb_catalog
+
+            return get_grb_catalog()
+        return self._catalog
+
+    def resolve_many(self, names):
+        """Returns the positions of several GRBs, with at most one remote query.
+
+        Parameters
+        ----------
+        names : iterable of str
+            GRB names, without the "GRB" prefix.
+
+        Returns
+        -------
+        dict
+            ``{name: (ra, dec)}`` in degrees for every name that could be resolved.
+        """
+        names = list(dict.fromkeys(names))
+        with self._lock:
+            catalog = self.catalog
+            cache = self.cache
+            remote = []
+            for name in names:
+                if name in self._positions or name in self._missing:
+                    continue
+                position = catalog.position_of(name)
+                if position is not None:
+                    self._positions[name] = position
+                    continue
+                cached = _try_cache(cache.get_position, name)
+                if cached is not None:
+                    self._positions[name] = cached
+                elif _try_cache(cache.is_missing_position, name):
+                    self._missing.add(name)
+                else:
+                    remote.append(name)
+
+            if remote:
+                # names are marked as looked up first, so a failing backend
+                # isn't asked about them again either
+                self._missing.update(remote)
+                found = self.backend.resolve(remote)
+                for name in remote:
+                    if name in found:
+                        ra, dec = found[name]
+                        self._missing.discard(name)
+                        self._positions[name] = (ra, dec)
+                        _try_cache(cache.put_position, name, ra, dec)
+                    else:
+                        _try_cache(cache.put_missing_position, name)
+
+            return {name: self._positions[name] for name in names if name in self._positions}
+
+    def resolve(self, name):
+        """Returns the (ra, dec) of a GRB in degrees.
+
+        Raises
+        ------
+        LookupError
+            If the position can't be found.
+        """
+        positions = self.resolve_many([name])
+        if name not in positions:
+            raise LookupError(
+                f"Couldn't find the position of GRB {name}. Please supply RA and DEC manually."
+            )
+        return positions[name]
+
+
+def _try_cache(method, *args):
+    # the cache only saves lookups, so one that can't be used is ignored
+    try:
+        return method(*args)
+    except sqlite3.Error:
+        return None
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_position_resolver(backend=None):
+    """Returns the process-wide `PositionResolver` used by `ebv2A_b`.
+
+    Parameters
+    ----------
+    backend : object, optional
+        If given, replaces the remote backend of the shared resolver
+        (see `PositionResolver`), e.g. with a local stand-in for testing.
+
+    Returns
+    -------
+    PositionResolver
+        The shared resolver.
+    """
+    global _resolver
+
+    with _resolver_lock:
+        if _resolver is None or backend is not None:
+            _resolver = PositionResolver(backend=backend)
+        return _resolver
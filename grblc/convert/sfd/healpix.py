@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+#
+# healpix.py
+# Minimal NumPy implementation of the HEALPix RING pixelization.
+#
+# This is a small subset of the HEALPix scheme (Gorski et al. 2005) that
+# is needed to store a resampled copy of the SFD map: converting between pixel
+# indices and angles on the sphere. It avoids depending on `healpy`, which is
+# not available on Windows (see the note in `map_base.py`). Results match
+# `healpy.ang2pix` / `healpy.pix2ang` with `nest=False`.
+#
+import numpy as np
+
+__all__ = ["nside2npix", "nside2resol", "ang2pix", "pix2ang"]
+
+
+def _check_nside(nside):
+    nside = int(nside)
+    if nside < 1 or nside & (nside - 1):
+        raise ValueError(f"nside must be a positive power of 2, not {nside}.")
+    return nside
+
+
+def nside2npix(nside):
+    """
+    Returns the number of pixels in a HEALPix map with the given ``nside``.
+    """
+    return 12 * _check_nside(nside) ** 2
+
+
+def nside2resol(nside):
+    """
+    Returns the approximate pixel size (the square root of the pixel area) of a
+    HEALPix map with the given ``nside``, in arcminutes.
+    """
+    return np.degrees(np.sqrt(4 * np.pi / nside2npix(nside))) * 60.
+
+
+def _isqrt(x):
+    # integer square root that is exact for the pixel indices we deal with
+    r = np.floor(np.sqrt(x)).astype(np.int64)
+    r -= r * r > x
+    r += (r + 1) * (r + 1) <= x
+    return r
+
+
+def ang2pix(nside, theta, phi):
+    """
+    Returns the RING scheme pixel index containing the given angles.
+    Args:
+        nside (int): The HEALPix resolution parameter (a power of 2).
+        theta (float or array-like): Colatitude, in radians, in [0, pi].
+        phi (float or array-like): Longitude, in radians.
+    Returns:
+        An int64 array of pixel indices, with the broadcast shape of ``theta``
+        and ``phi``.
+    Raises:
+        ValueError: If an angle isn't finite, or ``theta`` is outside [0, pi].
+    """
+    nside = _check_nside(nside)
+    theta, phi = np.broadcast_arrays(
+        np.asarray(theta, dtype=float), np.asarray(phi, dtype=float))
+    if not (np.all((theta >= 0) & (theta <= np.pi)) and np.all(np.isfinite(phi))):
+        raise ValueError("Angles must be finite, with theta in [0, pi].")
+
+    z = np.cos(theta)
+    za = np.abs(z)
+    tt = np.mod(phi, 2 * np.pi) / (0.5 * np.pi)  # in [0, 4)
+
+    ncap = 2 * nside * (nside - 1)
+    npix = 12 * nside * nside
+    pix = np.empty(z.shape, dtype=np.int64)
+
+    # equatorial belt
+    eq = za <= 2. / 3.
+    t1 = nside * (0.5 + tt[eq])
+    t2 = nside * 0.75 * z[eq]
+    jp = np.floor(t1 - t2).astype(np.int64)  # index of ascending edge line
+    jm = np.floor(t1 + t2).astype(np.int64)  # index of descending edge line
+    ir = nside + 1 + jp - jm  # ring number counted from z = 2/3, in [1, 2 nside + 1]
+    kshift = 1 - (ir & 1)
+    ip = (jp + jm - nside + kshift + 1) // 2
+    ip = np.mod(ip, 4 * nside)
+    pix[eq] = ncap + (ir - 1) * 4 * nside + ip
+
+    # polar caps
+    cap = ~eq
+    tc = tt[cap]
+    tp = tc - np.floor(tc)
+    tmp = nside * np.sqrt(3 * (1 - za[cap]))
+    jp = np.floor(tp * tmp).astype(np.int64)
+    jm = np.floor((1 - tp) * tmp).astype(np.int64)
+    ir = jp + jm + 1  # ring number counted from the closest pole
+    ip = np.floor(tc * ir).astype(np.int64)
+    ip = np.mod(ip, 4 * ir)
+    pix[cap] = np.where(
+        z[cap] > 0, 2 * ir * (ir - 1) + ip, npix - 2 * ir * (ir + 1) + ip)
+
+    return pix
+
+
+def pix2ang(nside, pix):
+    """
+    Returns the angles of the centres of the given RING scheme pixels.
+    Args:
+        nside (int): The HEALPix resolution parameter (a power of 2).
+        pix (int or array-like): Pixel indices.
+    Returns:
+        A tuple ``(theta, phi)`` of colatitude and longitude, in radians, with
+        the shape of ``pix``.
+    """
+    nside = _check_nside(nside)
+    pix = np.asarray(pix, dtype=np.int64)
+
+    ncap = 2 * nside * (nside - 1)
+    npix = 12 * nside * nside
+    if np.any((pix < 0) | (pix >= npix)):
+        raise ValueError(f"Pixel indices must be in [0, {npix}) for nside {nside}.")
+
+    z = np.empty(pix.shape)
+    phi = np.empty(pix.shape)
+
+    # north polar cap
+    m = pix < ncap
+    iring = (1 + _isqrt(1 + 2 * pix[m])) >> 1
+    iphi = pix[m] + 1 - 2 * iring * (iring - 1)
+    z[m] = 1 - iring * iring * 4. / npix
+    phi[m] = (iphi - 0.5) * np.pi / (2 * iring)
+
+    # equatorial belt
+    m = (pix >= ncap) & (pix < npix - ncap)
+    ip = pix[m] - ncap
+    iring = ip // (4 * nside) + nside
+    iphi = ip % (4 * nside) + 1
+    fodd = np.where((iring + nside) & 1, 1., 0.5)
+    z[m] = (2 * nside - iring) * 2. / (3 * nside)
+    phi[m] = (iphi - fodd) * np.pi / (2 * nside)
+
+    # south polar cap
+    m = pix >= npix - ncap
+    ip = npix - pix[m]
+    iring = (1 + _isqrt(2 * ip - 1)) >> 1
+    iphi = 4 * iring + 1 - (ip - 2 * iring * (iring - 1))
+    z[m] = -1 + iring * iring * 4. / npix
+    phi[m] = (iphi - 0.5) * np.pi / (2 * iring)
+
+    return np.arccos(z), phi
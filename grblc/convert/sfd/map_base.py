@@ -36,6 +36,35 @@ from . import json_serializers
 
 # import time
 
+# Rotation matrix from ICRS to Galactic Cartesian coordinates, as used by
+# `astropy.coordinates` (includes the frame bias between ICRS and FK5 J2000).
+ICRS_TO_GALACTIC = np.array([
+    [-0.05487565771259163, -0.8734370519556159, -0.48383507361671546],
+    [0.4941094371927268, -0.44482972122329517, 0.7469821839866676],
+    [-0.8676661375596576, -0.19807633727300059, 0.45598381368730156]])
+
+
+def icrs_to_galactic(ra, dec):
+    """
+    Converts ICRS coordinates to Galactic coordinates with a single rotation,
+    without creating any :obj:`astropy.coordinates.SkyCoord` objects.
+    Args:
+        ra (:obj:`float`, scalar or array-like): Right ascension, in degrees.
+        dec (:obj:`float`, scalar or array-like): Declination, in degrees.
+    Returns:
+        A tuple ``(l, b)`` of Galactic longitude, in [0, 360), and latitude,
+        in degrees, with the broadcast shape of ``ra`` and ``dec``.
+    """
+    ra, dec = np.broadcast_arrays(np.radians(ra), np.radians(dec))
+    cos_dec = np.cos(dec)
+    xyz = np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+    x, y, z = np.tensordot(ICRS_TO_GALACTIC, xyz, axes=1)
+
+    l = np.degrees(np.arctan2(y, x)) % 360.
+    b = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    return l, b
+
+
 def ensure_coord_type(f):
     """
     A decorator for class methods of the form
@@ -411,6 +440,41 @@ class DustMap:
 
         return self.query(coords, **kwargs)
 
+    def query_gal_array(self, l, b, **kwargs):
+        """
+        Query using plain arrays of Galactic coordinates. The default
+        implementation goes through :obj:`query_gal`; derived classes can
+        override it with a path that does not create :obj:`SkyCoord` objects.
+        Args:
+            l (:obj:`float`, scalar or array-like): Galactic longitude, in degrees.
+            b (:obj:`float`, scalar or array-like): Galactic latitude, in degrees.
+            **kwargs: Any additional keyword arguments accepted by derived
+                classes.
+        Returns:
+            The results of the query, with the broadcast shape of ``l`` and
+            ``b``.
+        """
+        l = np.asarray(l, dtype=float)
+        b = np.asarray(b, dtype=float)
+        return self.query_gal(l, b, **kwargs)
+
+    def query_equ_array(self, ra, dec, **kwargs):
+        """
+        Query using plain arrays of ICRS coordinates. The coordinates are
+        rotated to Galactic coordinates with :obj:`icrs_to_galactic` and passed
+        on to :obj:`query_gal_array`.
+        Args:
+            ra (:obj:`float`, scalar or array-like): Right ascension, in degrees.
+            dec (:obj:`float`, scalar or array-like): Declination, in degrees.
+            **kwargs: Any additional keyword arguments accepted by derived
+                classes.
+        Returns:
+            The results of the query, with the broadcast shape of ``ra`` and
+            ``dec``.
+        """
+        l, b = icrs_to_galactic(ra, dec)
+        return self.query_gal_array(l, b, **kwargs)
+
 
 class WebDustMap:
     """
@@ -19,21 +19,113 @@
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 #
+# This file has been modified to memory-map the map files and open each pole
+# on first use, and to add a process-wide SFD map (`get_sfd_query`) that is
+# shared by all extinction lookups. A precomputed HEALPix resampling of the map
+# (`SFDHealpixQuery`) can be used for constant-time lookups, and the spline
+# coefficients used for higher-order interpolation are cached.
+#
+import json
 import os
+import threading
 
 import astropy.io.fits as fits
 import astropy.wcs as wcs
 import numpy as np
 from scipy.ndimage import map_coordinates
+from scipy.ndimage import spline_filter
 
 from . import dustexceptions
 from . import fetch_utils
+from . import healpix
+from .config import config
 from .map_base import DustMap
 from .map_base import ensure_flat_galactic
 from .map_base import WebDustMap
 from .std_paths import *
 
 
+class ZEAPolarProjection:
+    """
+    Closed-form world-to-pixel transform for zenithal equal-area (ZEA) maps
+    centred on a celestial pole, like the SFD'98 polar maps.
+
+    This is the same transform as ``WCS.wcs_world2pix(lon, lat, 0)`` for such
+    maps, but is evaluated with a few vectorized NumPy operations instead of
+    going through WCSLIB, which dominates the cost of small queries.
+    """
+
+    def __init__(self, w):
+        """
+        Args:
+            w (`astropy.wcs.WCS`): The map's WCS. Use :obj:`from_wcs` to check
+                that it is supported first.
+        """
+        w.wcs.set()
+        north = w.wcs.crval[1] > 0
+        sign = 1. if north else -1.
+        lon_ref = np.radians(w.wcs.crval[0])
+        lonpole = np.radians(w.wcs.lonpole)
+
+        # Native longitude is phi = lonpole + (lon - lon_ref) - 180 deg around
+        # the north pole and phi = lonpole - (lon - lon_ref) around the south
+        # pole, while the native colatitude is 90 deg -/+ lat. ZEA then places
+        # a point at radius R = 2 (180 / pi) sin(colatitude / 2), at
+        # (x, y) = (R sin(phi), -R cos(phi)) in intermediate world coordinates.
+        # All constant factors are folded together here.
+        self._lon_scale = sign * np.pi / 180.
+        self._phi0 = lonpole - sign * lon_ref - (np.pi if north else 0.)
+        self._lat_scale = sign * np.pi / 360.
+
+        inv_cd = 2. * np.degrees(1.) * np.linalg.inv(w.pixel_scale_matrix)
+        self._x = (w.wcs.crpix[0] - 1., inv_cd[0, 0], -inv_cd[0, 1])
+        self._y = (w.wcs.crpix[1] - 1., inv_cd[1, 0], -inv_cd[1, 1])
+
+    @classmethod
+    def from_wcs(cls, w):
+        """
+        Returns a :obj:`ZEAPolarProjection` for ``w``, or ``None`` if ``w`` isn't
+        a plain two-axis ZEA projection with its reference point on a pole.
+        """
+        try:
+            w.wcs.set()
+            supported = (
+                w.naxis == 2
+                and w.wcs.lng == 0 and w.wcs.lat == 1
+                and all(c.endswith('-ZEA') for c in w.wcs.ctype)
+                and abs(abs(w.wcs.crval[1]) - 90.) < 1e-10
+                and not w.has_distortion
+            )
+        except Exception:
+            return None
+
+        return cls(w) if supported else None
+
+    def world2pix(self, lon, lat):
+        """
+        Args:
+            lon, lat (array-like): Celestial longitude and latitude, in degrees.
+        Returns:
+            The 0-based pixel coordinates ``(x, y)``.
+        """
+        phi = np.multiply(lon, self._lon_scale) + self._phi0
+        r = np.sin(np.pi / 4. - np.multiply(lat, self._lat_scale))
+        r_sin = r * np.sin(phi)
+        r_cos = r * np.cos(phi)
+
+        x0, x_sin, x_cos = self._x
+        y0, y_sin, y_cos = self._y
+        x = x0 + x_sin * r_sin + x_cos * r_cos
+        y = y0 + y_sin * r_sin + y_cos * r_cos
+        return x, y
+
+
+# `map_coordinates` pads the map by this many pixels (repeating the edge
+# values) before prefiltering it in 'nearest' mode. The cached coefficients are
+# padded the same way, so they give identical results.
+_SPLINE_PAD = 12
+
+
 class SFDBase(DustMap):
     """
     Queries maps stored in the same format as Schlegel, Finkbeiner & Davis (1998).
@@ -43,24 +135,165 @@ class SFDBase(DustMap):
     map_name_long = ''
     poles = ['ngp', 'sgp']
 
-    def __init__(self, base_fname):
+    def __init__(self, base_fname, analytic_projection=True, spline_cache_dir=None):
         """
         Args:
             base_fname (str): The map should be stored in two FITS files, named
                 ``base_fname + '_' + X + '.fits'``, where ``X`` is ``'ngp'`` and
                 ``'sgp'``.
+            analytic_projection (Optional[bool]): Compute pixel coordinates with
+                :obj:`ZEAPolarProjection` when the map's WCS allows it, instead
+                of through WCSLIB. Defaults to `True`.
+            spline_cache_dir (Optional[str]): Directory in which to save the
+                spline coefficients used for ``order > 1`` interpolation, so
+                they are only computed once across processes. Defaults to
+                `None`, which keeps them in memory only.
+
+        The FITS files are memory-mapped, and each one is only opened when a
+        query first falls in its hemisphere. Processes sharing the same map
+        files therefore also share one copy of them in the OS page cache.
         """
+        self._fnames = {}
+        self._hdulists = {}
         self._data = {}
+        self._projections = {}
+        self._coefficients = {}
+        self._analytic_projection = analytic_projection
+        self._spline_cache_dir = spline_cache_dir
+        self._lock = threading.Lock()
 
         for pole in self.poles:
             fname = f'{base_fname}_{pole}.fits'
-            try:
-                with fits.open(fname) as hdulist:
-                    self._data[pole] = [hdulist[0].data, wcs.WCS(hdulist[0].header)]
-            except OSError as error:
+            if not os.path.isfile(fname):
                 print(dustexceptions.data_missing_message(self.map_name,
                                                           self.map_name_long))
-                raise error
+                raise FileNotFoundError(f'No such file: {fname}')
+            self._fnames[pole] = fname
+
+    def _pole(self, pole):
+        """
+        Returns the ``[data, wcs]`` pair for one pole, memory-mapping its FITS
+        file the first time it is needed.
+        """
+        if pole not in self._data:
+            with self._lock:
+                if pole not in self._data:
+                    hdulist = fits.open(self._fnames[pole], memmap=True)
+                    w = wcs.WCS(hdulist[0].header)
+                    if self._analytic_projection:
+                        self._projections[pole] = ZEAPolarProjection.from_wcs(w)
+                    self._hdulists[pole] = hdulist
+                    self._data[pole] = [hdulist[0].data, w]
+
+        return self._data[pole]
+
+    def _spline_coefficients(self, pole, order):
+        """
+        Returns the spline coefficients of one pole's map for interpolation of
+        the given order, computing them the first time they are needed. They
+        are padded by ``_SPLINE_PAD`` pixels on every side.
+
+        The coefficients are stored as float64, so each (pole, order) pair
+        takes about 135 MB for the 4096x4096 SFD maps.
+        """
+        key = (pole, order)
+        if key not in self._coefficients:
+            data, w = self._pole(pole)
+            with self._lock:
+                if key not in self._coefficients:
+                    self._coefficients[key] = self._load_spline_coefficients(
+                        pole, data, order)
+
+        return self._coefficients[key]
+
+    def _load_spline_coefficients(self, pole, data, order):
+        cache_fname = None
+        if self._spline_cache_dir is not None:
+            base = os.path.splitext(os.path.basename(self._fnames[pole]))[0]
+            cache_fname = os.path.join(self._spline_cache_dir, f'{base}_spline{order}.npy')
+
+            # reuse the cached file unless the map was replaced since it was written
+            if (os.path.isfile(cache_fname) and
+                    os.path.getmtime(cache_fname) >= os.path.getmtime(self._fnames[pole])):
+                coefficients = np.load(cache_fname, mmap_mode='r')
+                if coefficients.shape == tuple(n + 2 * _SPLINE_PAD for n in data.shape):
+                    return coefficients
+
+        padded = np.pad(np.asarray(data, dtype='f8'), _SPLINE_PAD, mode='edge')
+        coefficients = spline_filter(padded, order=order, output=np.float64, mode='nearest')
+
+        if cache_fname is not None:
+            os.makedirs(self._spline_cache_dir, exist_ok=True)
+            # write to a temporary name first so readers never see a partial file
+            tmp_fname = cache_fname[:-len('.npy')] + f'.{os.getpid()}.tmp.npy'
+            np.save(tmp_fname, coefficients)
+            os.replace(tmp_fname, cache_fname)
+
+        return coefficients
+
+    def _sample(self, pole, x, y, order):
+        """
+        Interpolates one pole's map at the pixel coordinates ``(x, y)``.
+
+        For ``order > 1`` the cached spline coefficients of the map are
+        interpolated directly (with ``prefilter=False``), so no prefilter runs
+        per query. Either way, only the block of the map spanned by the
+        coordinates (plus the interpolation footprint) is read, so small
+        queries touch a few pages of the memory-mapped arrays.
+        """
+        if order > 1:
+            data = self._spline_coefficients(pole, order)
+            x = x + _SPLINE_PAD
+            y = y + _SPLINE_PAD
+        else:
+            data, w = self._pole(pole)
+
+        ny, nx = data.shape
+        finite = np.isfinite(x) & np.isfinite(y)
+        if not np.any(finite):
+            return np.full(len(x), np.nan, dtype='f4')
+
+        pad = order + 1
+        x0 = min(max(int(np.floor(x[finite].min())) - pad, 0), nx - 1)
+        x1 = max(min(int(np.ceil(x[finite].max())) + pad + 1, nx), x0 + 1)
+        y0 = min(max(int(np.floor(y[finite].min())) - pad, 0), ny - 1)
+        y1 = max(min(int(np.ceil(y[finite].max())) + pad + 1, ny), y0 + 1)
+
+        # copy of the block in native byte order (FITS data is big-endian)
+        block = np.asarray(data[y0:y1, x0:x1], dtype='f4' if order <= 1 else 'f8')
+        return map_coordinates(block, [y - y0, x - x0], order=order,
+                               mode='nearest', prefilter=False)
+
+    def _world2pix(self, pole, l, b):
+        data, w = self._pole(pole)
+        proj = self._projections.get(pole)
+        if proj is not None:
+            return proj.world2pix(l, b)
+        return w.wcs_world2pix(l, b, 0)
+
+    def close(self):
+        """
+        Releases the map data held by this query object.
+        """
+        with self._lock:
+            self._data = {}
+            self._projections = {}
+            self._coefficients = {}
+            for hdulist in self._hdulists.values():
+                hdulist.close()
+            self._hdulists = {}
+
+    def _query_lb(self, l, b, order):
+        out = np.full(len(l), np.nan, dtype='f4')
+
+        for pole in self.poles:
+            m = (b >= 0) if pole == 'ngp' else (b < 0)
+
+            if np.any(m):
+                x, y = self._world2pix(pole, l[m], b[m])
+                out[m] = self._sample(pole, x, y, order)
+
+        return out
 
     @ensure_flat_galactic
     def query(self, coords, order=1):
@@ -75,17 +308,28 @@ class SFDBase(DustMap):
             The shape of the output will be the same as the shape of the
             coordinates stored by `coords`.
         """
-        out = np.full(len(coords.l.deg), np.nan, dtype='f4')
-
-        for pole in self.poles:
-            m = (coords.b.deg >= 0) if pole == 'ngp' else (coords.b.deg < 0)
+        return self._query_lb(coords.l.deg, coords.b.deg, order)
 
-            if np.any(m):
-                data, w = self._data[pole]
-                x, y = w.wcs_world2pix(coords.l.deg[m], coords.b.deg[m], 0)
-                out[m] = map_coordinates(data, [y, x], order=order, mode='nearest')
+    def query_gal_array(self, l, b, order=1):
+        """
+        Returns the map value at the specified Galactic coordinates, given as
+        plain arrays. Unlike :obj:`query`, no :obj:`SkyCoord` objects are
+        created, which makes this much faster for bulk lookups.
+        Args:
+            l (`float` or array-like): Galactic longitude, in degrees.
+            b (`float` or array-like): Galactic latitude, in degrees.
+            order (Optional[int]): Interpolation order to use. Defaults to `1`,
+                for linear interpolation.
+        Returns:
+            A float array containing the map value at every input coordinate,
+            with the broadcast shape of `l` and `b` (a scalar for scalar input).
+        """
+        l, b = np.broadcast_arrays(np.asarray(l, dtype=float), np.asarray(b, dtype=float))
+        out = self._query_lb(l.ravel(), b.ravel(), order)
 
-        return out
+        if l.ndim == 0:
+            return out[0]
+        return out.reshape(l.shape)
 
 
 class SFDQuery(SFDBase):
@@ -96,12 +340,18 @@ class SFDQuery(SFDBase):
     map_name = 'sfd'
     map_name_long = "SFD'98"
 
-    def __init__(self, map_dir=None):
+    def __init__(self, map_dir=None, analytic_projection=True, spline_cache_dir=None):
         """
         Args:
             map_dir (Optional[str]): The directory containing the SFD map.
                 Defaults to `None`, which means that `dustmaps` will look in its
                 default data directory.
+            analytic_projection (Optional[bool]): Use the closed-form ZEA
+                projection (see :obj:`ZEAPolarProjection`) rather than WCSLIB
+                to find map pixels. Defaults to `True`.
+            spline_cache_dir (Optional[str]): Directory in which to save the
+                spline coefficients for ``order > 1`` queries. Defaults to
+                `None`, which keeps them in memory only.
         """
 
         if map_dir is None:
@@ -109,7 +359,8 @@ class SFDQuery(SFDBase):
 
         base_fname = os.path.join(map_dir, 'SFD_dust_4096')
 
-        super().__init__(base_fname)
+        super().__init__(base_fname, analytic_projection=analytic_projection,
+                         spline_cache_dir=spline_cache_dir)
 
     def query(self, coords, order=1):
         """
@@ -128,6 +379,303 @@ class SFDQuery(SFDBase):
         return super().query(coords, order=order)
 
 
+def healpix_fname(nside, map_dir=None):
+    """
+    Returns the path of the HEALPix resampling of the SFD map with the given
+    ``nside``, as written by :obj:`build_sfd_healpix`.
+    """
+    if map_dir is None:
+        map_dir = os.path.join(data_dir(), 'sfd')
+    return os.path.join(map_dir, f'SFD_dust_healpix_{nside}.npy')
+
+
+def _error_fname(fname):
+    # where build_sfd_healpix records the measured error of a table
+    return fname[:-len('.npy')] + '_error.json'
+
+
+class SFDHealpixQuery(DustMap):
+    """
+    Queries a precomputed HEALPix (RING scheme) resampling of the SFD'98 map.
+
+    Each lookup is a single pixel-index computation followed by an array read,
+    so its cost does not depend on the map resolution and no interpolation is
+    done. In exchange, the value returned is that of the SFD map at the centre
+    of the HEALPix pixel containing the position rather than at the position
+    itself, so the result differs from :obj:`SFDQuery` by however much the map
+    varies across one HEALPix pixel. The pixel size is
+    ``healpix.nside2resol(nside)``: about 3.4' for ``nside=1024`` and 1.7' for
+    ``nside=2048``, compared with about 2.4' for the SFD pixels at the poles.
+
+    How much that changes E(B-V) depends on the small-scale structure of the
+    map, so :obj:`build_sfd_healpix` measures it against :obj:`SFDQuery` (see
+    :obj:`healpix_error`) when it builds a table, prints it, and saves it next
+    to the table; it is available as :obj:`error`. Build both resolutions and
+    compare their ``median_abs`` and ``p99_abs`` to choose an ``nside``: at
+    twice the ``nside`` the pixels are half as wide, so for a smooth map the
+    error roughly halves, for four times the memory.
+    """
+
+    map_name = 'sfd_healpix'
+    map_name_long = "SFD'98 (HEALPix)"
+
+    def __init__(self, nside=1024, map_dir=None):
+        """
+        Args:
+            nside (Optional[int]): The resolution of the table to load.
+                Defaults to `1024`.
+            map_dir (Optional[str]): The directory containing the table.
+                Defaults to `None`, which means the SFD map directory.
+        """
+        self.nside = nside
+        self.fname = healpix_fname(nside, map_dir)
+
+        if not os.path.isfile(self.fname):
+            print(f'HEALPix SFD table not found at {self.fname}. Build it with '
+                  f'`grblc.convert.sfd.build_sfd_healpix(nside={nside})`.')
+            raise FileNotFoundError(self.fname)
+
+        # memory-mapped, so only the pages that are looked up are read
+        self._data = np.load(self.fname, mmap_mode='r')
+        if len(self._data) != healpix.nside2npix(nside):
+            raise ValueError(
+                f'{self.fname} does not contain a HEALPix map with nside {nside}.')
+
+    @property
+    def error(self):
+        """
+        The difference from :obj:`SFDQuery` measured when the table was built,
+        as returned by :obj:`healpix_error`, or `None` if it wasn't recorded.
+        """
+        try:
+            with open(_error_fname(self.fname)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def close(self):
+        """
+        Releases the table held by this query object.
+        """
+        self._data = None
+
+    @ensure_flat_galactic
+    def query(self, coords, order=None):
+        """
+        Returns E(B-V) at the specified location(s) on the sky.
+        Args:
+            coords (`astropy.coordinates.SkyCoord`): The coordinates to query.
+            order: Ignored. Accepted for compatibility with :obj:`SFDQuery`.
+        Returns:
+            A float array containing the SFD E(B-V) at every input coordinate.
+            The shape of the output will be the same as the shape of the
+            coordinates stored by `coords`.
+        """
+        return self._query_lb(coords.l.deg, coords.b.deg)
+
+    def _query_lb(self, l, b):
+        # like SFDQuery, positions that aren't on the sky come out as NaN
+        valid = np.isfinite(l) & np.isfinite(b) & (np.abs(b) <= 90.)
+        out = np.full(np.shape(l), np.nan, dtype=self._data.dtype)
+        if np.any(valid):
+            pix = healpix.ang2pix(
+                self.nside, np.radians(90. - b[valid]), np.radians(l[valid]))
+            out[valid] = self._data[pix]
+        return out
+
+    def query_gal_array(self, l, b, order=None):
+        """
+        Returns E(B-V) at the specified Galactic coordinates, given as plain
+        arrays.
+        Args:
+            l (`float` or array-like): Galactic longitude, in degrees.
+            b (`float` or array-like): Galactic latitude, in degrees.
+            order: Ignored. Accepted for compatibility with :obj:`SFDQuery`.
+        Returns:
+            A float array with the broadcast shape of `l` and `b` (a scalar for
+            scalar input).
+        """
+        l, b = np.broadcast_arrays(np.asarray(l, dtype=float), np.asarray(b, dtype=float))
+        out = self._query_lb(l, b)
+        return out[()] if out.ndim == 0 else out
+
+
+def build_sfd_healpix(nside=1024, map_dir=None, out_dir=None, chunk_size=1 << 20,
+                      error_samples=100000):
+    """
+    Resamples the SFD'98 map onto a HEALPix grid and saves it for use with
+    :obj:`SFDHealpixQuery`. Each HEALPix pixel gets the value of the SFD map
+    (with linear interpolation) at its centre.
+
+    The table is then compared with the full map at ``error_samples`` random
+    positions (see :obj:`healpix_error`). The median and 99th percentile of
+    the absolute difference in E(B-V) are printed, and all the figures are
+    saved next to the table (see :obj:`SFDHealpixQuery.error`), so the error
+    at each ``nside`` can be compared before choosing one.
+    Args:
+        nside (Optional[int]): The HEALPix resolution. The table holds
+            ``12 * nside**2`` float32 values, i.e. 48 MB for the default of
+            `1024` and 192 MB for `2048`.
+        map_dir (Optional[str]): The directory containing the SFD map. Defaults
+            to the standard data directory.
+        out_dir (Optional[str]): Where to write the table. Defaults to
+            `map_dir`.
+        chunk_size (Optional[int]): Number of pixels to sample at a time.
+        error_samples (Optional[int]): Number of positions the error is
+            measured at. `0` skips the measurement.
+    Returns:
+        The path of the saved table.
+    """
+    if map_dir is None:
+        map_dir = os.path.join(data_dir(), 'sfd')
+    fname = healpix_fname(nside, out_dir if out_dir is not None else map_dir)
+
+    npix = healpix.nside2npix(nside)
+    out = np.empty(npix, dtype='f4')
+    query = SFDQuery(map_dir=map_dir)
+    try:
+        for start in range(0, npix, chunk_size):
+            pix = np.arange(start, min(start + chunk_size, npix))
+            theta, phi = healpix.pix2ang(nside, pix)
+            out[pix] = query.query_gal_array(np.degrees(phi), 90. - np.degrees(theta))
+
+        # write to a temporary name first so readers never see a partial table
+        tmp_fname = fname[:-len('.npy')] + '.tmp.npy'
+        np.save(tmp_fname, out)
+        os.replace(tmp_fname, fname)
+
+        error_fname = _error_fname(fname)
+        if os.path.exists(error_fname):
+            os.remove(error_fname)
+        if error_samples:
+            hp = SFDHealpixQuery(nside=nside, map_dir=os.path.dirname(fname))
+            error = healpix_error(hp, query, n=error_samples)
+            hp.close()
+            with open(error_fname, 'w') as f:
+                json.dump(dict(error, nside=nside, n=error_samples), f, indent=2)
+            print(f'HEALPix SFD table (nside={nside}) differs from SFDQuery by '
+                  f'{error["median_abs"]:.2g} (median) and {error["p99_abs"]:.2g} '
+                  f'(99th percentile) in E(B-V).')
+    finally:
+        query.close()
+
+    return fname
+
+
+def healpix_error(healpix_query, sfd_query=None, n=100000, seed=0):
+    """
+    Measures how much a :obj:`SFDHealpixQuery` differs from the full map, at
+    ``n`` positions drawn uniformly over the sky.
+    Args:
+        healpix_query (:obj:`SFDHealpixQuery`): The table to check.
+        sfd_query (Optional[:obj:`SFDQuery`]): The reference map. Defaults to
+            the shared map from :obj:`get_sfd_query`.
+        n (Optional[int]): Number of random positions.
+        seed (Optional[int]): Seed for the random positions.
+    Returns:
+        A dict with the median, 99th percentile and maximum of the absolute
+        difference in E(B-V), and the median and 99th percentile of the
+        relative difference.
+    """
+    if sfd_query is None:
+        sfd_query = get_sfd_query()
+
+    rng = np.random.default_rng(seed)
+    l = rng.uniform(0., 360., n)
+    b = np.degrees(np.arcsin(rng.uniform(-1., 1., n)))
+
+    ref = sfd_query.query_gal_array(l, b).astype(float)
+    diff = np.abs(healpix_query.query_gal_array(l, b) - ref)
+    rel = diff[ref > 0] / ref[ref > 0]
+
+    return {
+        'median_abs': float(np.median(diff)),
+        'p99_abs': float(np.percentile(diff, 99)),
+        'max_abs': float(np.max(diff)),
+        'median_rel': float(np.median(rel)),
+        'p99_rel': float(np.percentile(rel, 99)),
+    }
+
+
+_sfd_query = None
+_sfd_map_dir = None
+_sfd_nside = None
+_sfd_lock = threading.Lock()
+
+
+def get_sfd_query(map_dir=None, nside=None):
+    """
+    Returns a process-wide :obj:`SFDQuery`, loading the map the first time it is
+    requested. Every later call (from any thread) shares the same object, so the
+    FITS files are only read once per process.
+    Args:
+        map_dir (Optional[str]): The directory containing the SFD map. Defaults
+            to `None`, which reuses the currently loaded map, or the default
+            data directory if none is loaded yet. Passing a different directory
+            reloads the map from there.
+        nside (Optional[int]): Use the precomputed HEALPix table with this
+            resolution (see :obj:`SFDHealpixQuery`) instead of the full map.
+            Defaults to the ``healpix_nside`` configuration option, which is
+            unset (full map) unless chosen with
+            ``config['healpix_nside'] = 1024``.
+    Returns:
+        The shared :obj:`SFDQuery` (or :obj:`SFDHealpixQuery`).
+    """
+    global _sfd_query, _sfd_map_dir, _sfd_nside
+
+    if nside is None:
+        nside = config.get('healpix_nside')
+
+    with _sfd_lock:
+        if _sfd_query is not None and (
+                (map_dir is not None and map_dir != _sfd_map_dir) or nside != _sfd_nside):
+            _sfd_query.close()
+            _sfd_query = None
+
+        if _sfd_query is None:
+            if nside is None:
+                _sfd_query = SFDQuery(map_dir=map_dir)
+            else:
+                _sfd_query = SFDHealpixQuery(nside=nside, map_dir=map_dir)
+            _sfd_map_dir = map_dir
+            _sfd_nside = nside
+
+        return _sfd_query
+
+
+def sfd_map_id():
+    """
+    Returns a short name for the map :obj:`get_sfd_query` returns (or will
+    return, if nothing is loaded yet), e.g. ``'sfd'`` or ``'sfd_healpix_1024'``.
+    Used to key caches of values read from the map.
+    """
+    nside = _sfd_nside if _sfd_query is not None else config.get('healpix_nside')
+    return 'sfd' if nside is None else f'sfd_healpix_{nside}'
+
+
+def close_sfd_query():
+    """
+    Releases the shared map loaded by :obj:`get_sfd_query`. The next call to
+    :obj:`get_sfd_query` loads it again.
+    """
+    global _sfd_query, _sfd_map_dir, _sfd_nside
+
+    with _sfd_lock:
+        if _sfd_query is not None:
+            _sfd_query.close()
+        _sfd_query = None
+        _sfd_map_dir = None
+        _sfd_nside = None
+
+
+def reload_sfd_query(map_dir=None, nside=None):
+    """
+    Closes and reloads the shared map, e.g. after the map files were replaced.
+    """
+    close_sfd_query()
+    return get_sfd_query(map_dir=map_dir, nside=nside)
+
+
 class SFDWebQuery(WebDustMap):
     """
     Remote query over the web for the Schlegel, Finkbeiner & Davis (1998) dust
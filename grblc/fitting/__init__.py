@@ -1,6 +1,34 @@
 __author__ = "Sam Young, Nicole Osborn"
 
+import importlib
+
 from ..util import get_dir, set_dir
+from . import model as _model
 from .model import *
-from .lightcurve import *
-from .outlier import *
+
+# `lightcurve` and `outlier` pull in lmfit, matplotlib, plotly and IPython, so
+# they are only imported the first time one of their names is accessed
+# (PEP 562). This keeps `import grblc.fitting` cheap for headless jobs.
+_lazy_attrs = {
+    "Lightcurve": ".lightcurve",
+    "OutlierPlot": ".outlier",
+}
+_lazy_modules = ("io", "lightcurve", "outlier")
+
+__all__ = ["get_dir", "set_dir", *_model.__all__, *_lazy_attrs]
+
+
+def __getattr__(name):
+    if name in _lazy_attrs:
+        value = getattr(importlib.import_module(_lazy_attrs[name], __name__), name)
+    elif name in _lazy_modules:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attrs) | set(_lazy_modules))
@@ -1,9 +1,21 @@
+import fnmatch
+import itertools
+import json
+import mmap
 import os
 import re
+import struct
+from io import StringIO
 
 import numpy as np
 import pandas as pd
 
+from ..util import is_columnar
+from ..util import open_text
+from ..util import read_columnar
+from ..util import strip_compression
+from .constants import grb_regex
+
 
 def isfloat(value):
     try:
@@ -13,13 +25,24 @@ def isfloat(value):
         return False
 
 
+# number of leading lines read (and decompressed) when looking for a header row
+HEADER_BLOCK_LINES = 100
+
+
 def check_header(path, n=None, debug=False, more_than_one_row=False):
     """
     This monstrosity returns what line a header is at
+
+    Only the first :py:data:`HEADER_BLOCK_LINES` lines of the file are read, so
+    sniffing the header of a large (or compressed) table stays cheap.
     """
-    with open(path) as f:
-        lines = f.readlines()
+    with open_text(path) as f:
+        lines = list(itertools.islice(f, HEADER_BLOCK_LINES))
+
+    return _check_header(path, lines, n=n, debug=debug, more_than_one_row=more_than_one_row)
 
+
+def _check_header(path, lines, n=None, debug=False, more_than_one_row=False):
     if isinstance(n, int) and n > len(lines):
         raise Exception(f"Error in file ({path})! Something wrong "
                          "is going on here and I can't find the "
@@ -27,14 +50,16 @@ def check_header(path, n=None, debug=False, more_than_one_row=False):
 
     try:
         # attempt importing the datafile with the header "n"
-        df = pd.read_csv(path, delimiter=r"\t+|\s+", header=n, engine="python")
+        df = pd.read_csv(
+            StringIO("".join(lines)), delimiter=r"\t+|\s+", header=n, engine="python"
+        )
     except pd.errors.ParserError as pe:
         if debug:
             print("ParserError:", pe)
 
         # if fail, recursively try again with the next row as the header
         n = -1 if n is None else n
-        return check_header(path, n=n + 1, more_than_one_row=True)
+        return _check_header(path, lines, n=n + 1, more_than_one_row=True)
     except pd.errors.EmptyDataError:
 
         if more_than_one_row:
@@ -48,19 +73,188 @@ def check_header(path, n=None, debug=False, more_than_one_row=False):
 
     # todo: if header is Int64Index, check the 2nd row (i.e. first row of data for the not isfloat)
     # ... so maybe change the h in [not isfloat(x) for x in h] to the second row???
-    if isinstance(h, type(pd.Index([], dtype=int))) or sum(isfloat(x) for x in h) >= 0.3 * len(h) // 1:
+    if pd.api.types.is_integer_dtype(h.dtype) or sum(isfloat(x) for x in h) >= max(1, 0.3 * len(h) // 1):
         if debug:
             print("Some are floats...")
 
         # recursively try again with the next row as the header
         n = -1 if n is None else n
-        return check_header(path, n=n + 1, more_than_one_row=True)
+        return _check_header(path, lines, n=n + 1, more_than_one_row=True)
     else:
         return n  # <-- the final stop in our recursion journey
 
 
 
 
+class FormatReader:
+    """
+    Describes how one lightcurve file layout maps onto the standard
+    ``time_sec | flux | flux_err`` columns.
+
+    Parameters
+    ----------
+    name : str
+        Name of the datatype (e.g., ``"oates"``).
+    columns : tuple of int
+        Positions of the columns passed to ``transform``, in order.
+    transform : callable, optional
+        Vectorized function taking one array per entry in ``columns`` and
+        returning ``(time, flux, flux_err)`` arrays. By default the three
+        columns are returned as they are.
+    match : str, re.Pattern or list of such, optional
+        Filename patterns used by :py:func:`check_datatype` to recognize this
+        layout. Strings are matched case-insensitively; precompiled patterns
+        are used as given.
+    aliases : tuple of str, optional
+        Other names this datatype can be selected by.
+    """
+
+    def __init__(self, name, columns=(0, 1, 2), transform=None, match=(), aliases=()):
+        self.name = name.lower()
+        self.columns = tuple(columns)
+        self.transform = transform if transform is not None else lambda *cols: cols
+        self.aliases = tuple(a.lower() for a in aliases)
+
+        if isinstance(match, (str, re.Pattern)):
+            match = [match]
+        self._patterns = [
+            m if isinstance(m, re.Pattern) else re.compile(m, re.IGNORECASE)
+            for m in match
+        ]
+
+    def __repr__(self):
+        return f"<grbLC> {self.__class__.__name__}({self.name})"
+
+    def matches(self, filename):
+        return any(p.search(filename) for p in self._patterns)
+
+    def read(self, df):
+        """
+        Applies the column mapping and transform to a parsed table.
+
+        Returns
+        -------
+        pandas.DataFrame
+            ``time_sec | flux | flux_err`` in linear space.
+        """
+        if df.shape[1] <= max(self.columns):
+            raise ValueError(
+                f"The '{self.name}' format needs at least {max(self.columns) + 1} "
+                f"columns, but only {df.shape[1]} were found."
+            )
+
+        block = df.iloc[:, list(self.columns)].to_numpy(dtype=np.float64).T
+        time, flux, fluxerr = self.transform(*block)
+
+        return pd.DataFrame(
+            {
+                "time_sec": np.asarray(time, dtype=np.float64),
+                "flux": np.asarray(flux, dtype=np.float64),
+                "flux_err": np.asarray(fluxerr, dtype=np.float64),
+            }
+        )
+
+
+# registered readers, in the order they are tried by `check_datatype`
+_readers = []
+
+
+def register_reader(reader, position=None):
+    """
+    Adds a :py:class:`FormatReader` to the registry so it can be selected by
+    name in :py:func:`read_data` or recognized by :py:func:`check_datatype`.
+
+    Parameters
+    ----------
+    reader : :py:class:`FormatReader`
+        The reader to register. Replaces any reader with the same name.
+    position : int, optional
+        Where to insert the reader in the filename-matching order, by default
+        after all existing readers.
+
+    Returns
+    -------
+    :py:class:`FormatReader`
+        The registered reader.
+    """
+    unregister_reader(reader.name)
+    if position is None:
+        _readers.append(reader)
+    else:
+        _readers.insert(position, reader)
+    return reader
+
+
+def unregister_reader(name):
+    name = name.lower()
+    _readers[:] = [r for r in _readers if r.name != name]
+
+
+def get_reader(datatype):
+    """
+    Returns the registered :py:class:`FormatReader` for a datatype name or alias.
+
+    Raises
+    ------
+    KeyError
+        If no reader is registered under that name.
+    """
+    datatype = datatype.lower()
+    for reader in _readers:
+        if datatype == reader.name or datatype in reader.aliases:
+            return reader
+    raise KeyError(f"No reader registered for datatype '{datatype}'.")
+
+
+def _half_width(maxflux, minflux):
+    return (maxflux - minflux) / (2 * 1.65)
+
+
+def _combined(time, flux, fluxerr, z, beta):
+    k = (1 + z) ** (1 - beta)
+    return time * (1 + z), flux * k, fluxerr * k
+
+
+register_reader(FormatReader("zaninoni", (0, 2, 3), match="zaninoni"))
+register_reader(FormatReader("si", match=["si", "gendre", "tarot"]))
+register_reader(FormatReader("liang", match="liang"))
+# regex here is for 'GRBid.txt' files
+register_reader(
+    FormatReader(
+        "kann",
+        (0, 1, 2, 3),
+        lambda t, f, pos, neg: (t, f, (pos + neg) / 2),
+        match=["kann", re.compile(r"(?<!.)\d+[A-Z]?\.txt")],
+    )
+)
+register_reader(
+    FormatReader(
+        "combined",
+        (0, 1, 2, 3, 4),
+        _combined,
+        match=re.compile(r"combined(?!rest)|comb(?!ined)"),
+        aliases=("comb",),
+    )
+)
+register_reader(FormatReader("combinedrest", match="combinedrest"))
+register_reader(
+    FormatReader(
+        "oates",
+        (0, 1, 2, 3),
+        lambda t, f, mx, mn: (t, f, _half_width(mx, mn)),
+        match="oates",
+    )
+)
+register_reader(
+    FormatReader(
+        "wczytywanie",
+        (0, 3, 4, 5),
+        lambda t, f, mx, mn: (t, f, _half_width(mx, mn)),
+        match=["wczytywanie", "block"],
+    )
+)
+
+
 def check_datatype(filename):
     """
     Given a filename, try and guess what dataset the data comes from
@@ -69,103 +263,137 @@ def check_datatype(filename):
     For example, a file named `*_Oates.txt` will be interpreted as data in the same format
     as Sam Oates' data.
 
+    Readers are tried in registration order (see :py:func:`register_reader`),
+    and ``si`` is assumed if none of them match.
     """
-    check = lambda x, *args: any([f in filename.lower() for f in [x, *args]])
+    for reader in _readers:
+        if reader.matches(filename):
+            return reader.name
 
-    if check("zaninoni"):
-        datatype = "zaninoni"
+    return "si"
 
-    elif check("si", "gendre", "tarot"):
-        datatype = "si"
 
-    elif check("liang"):
-        datatype = "liang"
+def read_manifest(path):
+    """
+    Reads a manifest assigning datatypes to lightcurve files, so readers can
+    be chosen explicitly rather than guessed from filenames.
 
-    # regex here is for 'GRBid.txt' files
-    elif check("kann") or re.search(r"(?<!.)\d+[A-Z]?\.txt", filename):
-        datatype = "kann"
+    The manifest is either a JSON object or a two column whitespace-delimited
+    text file of ``filename  datatype`` pairs. Filenames may be shell-style
+    patterns (e.g., ``*_UVOT.txt``) and are matched against file basenames.
 
-    elif re.search(r"combined(?!rest)", filename) or re.search(
-        r"comb(?!ined)", filename
-    ):
-        datatype = "combined"
+    Returns
+    -------
+    dict
+        ``{pattern: datatype}``
+    """
+    with open(path) as f:
+        if path.lower().endswith(".json"):
+            return {k: v.lower() for k, v in json.load(f).items()}
 
-    elif check("combinedrest"):
-        datatype = "combinedrest"
+        manifest = {}
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            pattern, datatype = line.split()[:2]
+            manifest[pattern] = datatype.lower()
+        return manifest
 
-    elif check("oates"):
-        datatype = "oates"
 
-    elif check("wczytywanie") or check("block"):
-        datatype = "wczytywanie"
+def _manifest_datatype(manifest, filename):
+    if isinstance(manifest, str):
+        manifest = read_manifest(manifest)
 
-    else:
-        datatype = "si"
+    if filename in manifest:
+        return manifest[filename]
 
-    return datatype
+    for pattern, datatype in manifest.items():
+        if fnmatch.fnmatch(filename, pattern):
+            return datatype
 
+    return ""
 
-def read_data(path, datatype="", header=-999, debug=False):
-    data = {}
 
-    if debug:
-        print("First 10 Lines:\n", "".join(open(path).readlines()[:10]))
-
-    header = check_header(path) if header==-999 else header
-
-    if header == -1:
+def read_data(path, datatype="", header=-999, debug=False, manifest=None):
+    """
+    Reads a lightcurve file into log space.
+
+    Parameters
+    ----------
+    path : str
+        Path to the lightcurve.
+    datatype : str, optional
+        Name of a registered reader (see :py:func:`register_reader`). If not
+        given, it is looked up in ``manifest`` and otherwise guessed from the
+        filename with :py:func:`check_datatype`.
+    header : int, optional
+        Header row, by default found with :py:func:`check_header`.
+    debug : bool, optional
+        Print debugging information, by default False
+    manifest : dict or str, optional
+        Manifest (or path to one, see :py:func:`read_manifest`) mapping
+        filenames to datatypes.
+
+    Returns
+    -------
+    pandas.DataFrame
+        ``time_sec | flux | flux_err`` as log10 values.
+    """
+    df = _read_linear(path, datatype=datatype, header=header, debug=debug, manifest=manifest)
+    if df is None:
         return
 
-    df = pd.read_csv(path, delimiter=r"\t+|\s+", header=header, engine="python")
-    header = h = df.columns
-
-    filename = os.path.split(path)[-1].lower()
-    datatype = datatype.lower() if datatype else check_datatype(filename)
-    if datatype in ["si", "liang", "combinedrest"]:
+    return _to_log(df)
 
-        time = df[h[0]]
-        flux = df[h[1]]
-        fluxerr = df[h[2]]
 
-    elif datatype == "zaninoni":
+def _read_linear(path, datatype="", header=-999, debug=False, manifest=None):
+    """
+    Reads a lightcurve file and returns its time, flux and flux error columns
+    in linear space, i.e., before any logarithms are taken.
+    """
+    if is_columnar(path):
+        # Parquet/Feather tables (e.g., from convertGRB) are typed, so there's
+        # no header to find and nothing to parse
+        df = read_columnar(path)
+        if debug:
+            print("First 10 Rows:\n", df.head(10))
+    else:
+        if debug:
+            with open_text(path) as f:
+                print("First 10 Lines:\n", "".join(itertools.islice(f, 10)))
 
-        time = df[h[0]]
-        flux = df[h[2]]
-        fluxerr = df[h[3]]
+        header = check_header(path) if header==-999 else header
 
-    elif datatype == "kann":
+        if header == -1:
+            return
 
-        time = df[h[0]]
-        flux = df[h[1]]
-        posfluxerr, negfluxerr = df[h[2]], df[h[3]]
-        fluxerr = (posfluxerr + negfluxerr) / 2
+        with open_text(path) as f:
+            df = pd.read_csv(f, delimiter=r"\t+|\s+", header=header, engine="python")
 
-    elif datatype == "oates":
+    filename = strip_compression(os.path.split(path)[-1])
+    if not datatype and manifest is not None:
+        datatype = _manifest_datatype(manifest, filename)
+    datatype = datatype.lower() if datatype else check_datatype(filename.lower())
 
-        time = df[h[0]]
-        flux = df[h[1]]
-        maxflux = df[h[2]]
-        minflux = df[h[3]]
-        fluxerr = (maxflux - minflux) / (2 * 1.65)
+    try:
+        reader = get_reader(datatype)
+    except KeyError:
+        if debug:
+            print('No datatype found. Assuming format: | time | flux | fluxerr |')
+        reader = get_reader("si")
 
-    elif datatype in ["combined", "comb"]:
-        z = df[h[3]]
-        beta = df[h[4]]
-        time = df[h[0]] * (1 + z)
-        flux = df[h[1]] * (1 + z) ** (1 - beta)
-        fluxerr = df[h[2]] * (1 + z) ** (1 - beta)
+    return reader.read(df)
 
-    elif datatype == "wczytywanie":
-        time = df[h[0]]
-        flux = df[h[3]]
-        maxflux = df[h[4]]
-        minflux = df[h[5]]
-        fluxerr = (maxflux - minflux) / (2 * 1.65)
 
-    else:
-        if debug:
-            print('No datatype found. Assuming format: | time | flux | fluxerr |')
-        return read_data(path, datatype='si', header=header, debug=debug)
+def _to_log(df):
+    """
+    Converts a linear ``time_sec | flux | flux_err`` table to log space.
+    """
+    data = {}
+    time = df["time_sec"]
+    flux = df["flux"]
+    fluxerr = df["flux_err"]
 
     try:
         logtime = np.log10(time)
@@ -190,3 +418,269 @@ def readin(directory="."):
     import glob2
 
     return np.asarray(glob2.glob(directory + "/*.txt"))
+
+
+# ---------------------------------------------------------------------------
+# packed lightcurve archive
+# ---------------------------------------------------------------------------
+#
+# Layout of an archive file (all integers little-endian):
+#
+#   | magic (8s) | version (uint32) | pad (uint32) | index offset (uint64) | index length (uint64) |
+#   | block 0 | block 1 | ... | JSON index |
+#
+# Each block holds one lightcurve stored column-wise as float64, i.e.
+# ``time_sec[n] | flux[n] | flux_err[n]``, and the JSON index maps each GRB
+# name to the (byte offset, number of rows) of its block.
+
+_ARCHIVE_MAGIC = b"GRBLCARC"
+_ARCHIVE_VERSION = 1
+_ARCHIVE_HEADER = struct.Struct("<8sIIQQ")
+_ARCHIVE_DTYPE = np.dtype("<f8")
+ARCHIVE_COLUMNS = ("time_sec", "flux", "flux_err")
+
+
+def write_archive(path, lightcurves):
+    """
+    Packs lightcurves into a single columnar archive file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the archive to write.
+    lightcurves : dict or iterable of (str, array_like) pairs
+        Mapping of GRB name to a table (:py:class:`pandas.DataFrame` or dict)
+        with ``time_sec``, ``flux`` and ``flux_err`` columns in linear space.
+
+    Returns
+    -------
+    str
+        Path to the written archive.
+    """
+    items = lightcurves.items() if hasattr(lightcurves, "items") else lightcurves
+
+    index = {}
+    with open(path, "wb") as f:
+        # placeholder header; rewritten once the index location is known
+        f.write(_ARCHIVE_HEADER.pack(_ARCHIVE_MAGIC, _ARCHIVE_VERSION, 0, 0, 0))
+
+        for name, table in items:
+            name = str(name)
+            if name in index:
+                raise ValueError(f"Duplicate lightcurve '{name}' in archive.")
+
+            block = np.vstack(
+                [np.asarray(table[col], dtype=_ARCHIVE_DTYPE) for col in ARCHIVE_COLUMNS]
+            )
+            index[name] = [f.tell(), block.shape[1]]
+            f.write(np.ascontiguousarray(block).tobytes())
+
+        index_offset = f.tell()
+        raw_index = json.dumps(
+            {"columns": list(ARCHIVE_COLUMNS), "dtype": _ARCHIVE_DTYPE.str, "grbs": index}
+        ).encode("utf-8")
+        f.write(raw_index)
+
+        f.seek(0)
+        f.write(
+            _ARCHIVE_HEADER.pack(
+                _ARCHIVE_MAGIC, _ARCHIVE_VERSION, 0, index_offset, len(raw_index)
+            )
+        )
+
+    return path
+
+
+class LightcurveArchive:
+    """
+    Memory-mapped reader for archives written by :py:func:`write_archive`.
+
+    Lightcurves are looked up by GRB name through the archive index and
+    returned as views into the mapped file, so accessing any burst costs the
+    same regardless of the archive size.
+
+    .. code-block:: python
+
+        with LightcurveArchive("lightcurves.grbarc") as archive:
+            df = archive["050525A"]  # linear time_sec | flux | flux_err
+            lc = Lightcurve(xdata=df.time_sec, ydata=df.flux, yerr=df.flux_err,
+                            data_space="lin", name="050525A")
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mm = None
+
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _ARCHIVE_HEADER.size:
+                raise ValueError(f"{path} is not a grbLC lightcurve archive.")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, __, index_offset, index_length = _ARCHIVE_HEADER.unpack(
+                self._mm[: _ARCHIVE_HEADER.size]
+            )
+            if magic != _ARCHIVE_MAGIC:
+                raise ValueError(f"{path} is not a grbLC lightcurve archive.")
+            if version != _ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive version {version} in {path}.")
+
+            index = json.loads(
+                self._mm[index_offset : index_offset + index_length].decode("utf-8")
+            )
+        except Exception:
+            self.close()
+            raise
+        self.columns = tuple(index["columns"])
+        self._dtype = np.dtype(index["dtype"])
+        self._index = {name: tuple(loc) for name, loc in index["grbs"].items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        return pd.DataFrame(self.get(name), copy=False)
+
+    def __repr__(self):
+        return f"<grbLC> {self.__class__.__name__}({self.path}, {len(self)} GRBs)"
+
+    @property
+    def names(self):
+        return list(self._index)
+
+    def get(self, name):
+        """
+        Returns the columns of a single lightcurve as read-only array views
+        into the archive.
+
+        Parameters
+        ----------
+        name : str
+            GRB name.
+
+        Returns
+        -------
+        dict
+            ``{column: numpy.ndarray}`` for each column in :py:attr:`columns`.
+
+        Raises
+        ------
+        KeyError
+            If the GRB is not in the archive.
+        ValueError
+            If the archive is closed.
+        """
+        if self._mm is None:
+            raise ValueError("archive is closed")
+        try:
+            offset, length = self._index[name]
+        except KeyError:
+            raise KeyError(f"GRB '{name}' is not in archive {self.path}.")
+
+        block = np.frombuffer(
+            self._mm, dtype=self._dtype, count=len(self.columns) * length, offset=offset
+        ).reshape(len(self.columns), length)
+
+        return dict(zip(self.columns, block))
+
+    def read_data(self, name):
+        """
+        Returns a lightcurve in the same log-space format as :py:func:`read_data`.
+        """
+        return _to_log(self[name])
+
+    def close(self):
+        """
+        Closes the archive. Safe to call more than once.
+
+        The mapping is unmapped right away, unless arrays handed out by
+        :py:meth:`get` still point into it; it is then unmapped once the last
+        of them is freed.
+        """
+        mm, self._mm = self._mm, None
+        if mm is not None:
+            try:
+                mm.close()
+            except BufferError:
+                pass
+
+
+def read_archive(path):
+    """
+    Opens a lightcurve archive for random access. See :py:class:`LightcurveArchive`.
+    """
+    return LightcurveArchive(path)
+
+
+def pack_archive(paths, archive_path, datatype="", names=None):
+    """
+    Converts lightcurve text files of any supported layout (see
+    :py:func:`check_datatype`) into a single archive.
+
+    Parameters
+    ----------
+    paths : list of str
+        Text files to pack.
+    archive_path : str
+        Path of the archive to write.
+    datatype : str, optional
+        Layout of the files. Guessed from each filename if not given.
+    names : list of str, optional
+        GRB names for each file, by default taken from the filename.
+
+    Returns
+    -------
+    str
+        Path to the written archive.
+    """
+    if names is None:
+        names = [_grb_name(p) for p in paths]
+
+    def _tables():
+        for name, path in zip(names, paths):
+            df = _read_linear(path, datatype=datatype)
+            if df is None:
+                continue
+            yield name, df
+
+    return write_archive(archive_path, _tables())
+
+
+def unpack_archive(archive_path, directory, suffix="_flux.txt"):
+    """
+    Writes every lightcurve in an archive back out as a tab-separated
+    ``time_sec | flux | flux_err`` text file (the ``si`` layout).
+
+    Returns
+    -------
+    list of str
+        Paths of the written files.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    written = []
+    with LightcurveArchive(archive_path) as archive:
+        for name in archive:
+            path = os.path.join(directory, f"{name}{suffix}")
+            archive[name].to_csv(path, sep="\t", index=False)
+            written.append(path)
+
+    return written
+
+
+def _grb_name(path):
+    filename = strip_compression(os.path.split(path)[-1])
+    match = grb_regex.search(filename)
+    return match[0] if match else os.path.splitext(filename)[0]
@@ -6,11 +6,8 @@ from copy import deepcopy
 from functools import reduce
 from typing import Dict
 
-import lmfit as lf
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from matplotlib.figure import Figure
 
 from . import io
 from ..util import get_dir
@@ -273,6 +270,21 @@ class Lightcurve:
 
         return xdata, ydata, xerr, yerr
 
+    @property
+    def catalog_entry(self):
+        """
+            The attributes of this GRB (photon index, trigger time, T90, redshift
+            and position) from the catalog shared with :py:mod:`grblc.convert`,
+            or None if it isn't listed there.
+
+        Returns
+        ----------
+        dict or None
+        """
+        from ..convert.catalog import get_grb_catalog
+
+        return get_grb_catalog().get(self.name)
+
     def show_data(self, save=False, fig_kwargs={}, save_kwargs={}):
         """
             Plots the lightcurve data. If no fit has been ran, :py:meth:`Lightcurve.show` will call
@@ -300,6 +312,7 @@ class Lightcurve:
         fig_kwargs : dict, optional
             Arguments to pass to ``plt.figure()``, by default {}.
         """
+        import matplotlib.pyplot as plt
 
         fig_dict = dict(
             figsize=[
@@ -407,6 +420,7 @@ class Lightcurve:
         `lmfit.minimizer.MinimizerResult`
             See `lmfit.Minimizer.MinimizerResult <https://lmfit.github.io/lmfit-py/fitting.html#lmfit.minimizer.MinimizerResult>`_ for more information.
         """
+        import lmfit as lf
 
         assert self.model is not None, "No model set."
         assert self.xdata is not None, "xdata not supplied"
@@ -618,6 +632,8 @@ class Lightcurve:
             lc.show_fit(detailed=True)
 
         """
+        import matplotlib.pyplot as plt
+
         assert getattr(self, "res", None) is not None, "No fit results found to show."
         if getattr(self, "_flux_fixed_inplace", False):
             warnings.warn("Flux corrections have been applied inplace, meaning that "
@@ -986,6 +1002,8 @@ class Lightcurve:
                 print("="*10 + f"detailed={detailed}" + "="*10)
                 lc.print_fit(detailed=detailed)
         """
+        import lmfit as lf
+
         if fix_flux is None:
             fix_flux = self.fix_flux
 
@@ -1010,6 +1028,9 @@ class Lightcurve:
             )
 
     def _savefig(self, fig, filename=None, suffix=None, format="pdf", **kwargs):
+        import matplotlib.pyplot as plt
+        from matplotlib.figure import Figure
+
         assert isinstance(fig, Figure), "figs must be a matplotlib Figure."
 
         suffix = "_" + suffix if suffix is not None else ""
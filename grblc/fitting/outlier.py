@@ -9,6 +9,8 @@ from IPython.display import display
 from plotly.graph_objects import FigureWidget
 
 from ..util import get_dir
+from ..util import is_columnar
+from ..util import read_columnar
 from .constants import grb_regex
 from .io import check_header
 from .lightcurve import Lightcurve
@@ -41,12 +43,15 @@ class OutlierPlot:
 
         if filename:
             self.main_path = os.path.dirname(filename)
-            self.df = pd.read_csv(
-                filename,
-                delimiter=r"\t+|\s+",
-                engine="python",
-                header=check_header(filename),
-            )
+            if is_columnar(filename):
+                self.df = read_columnar(filename)
+            else:
+                self.df = pd.read_csv(
+                    filename,
+                    delimiter=r"\t+|\s+",
+                    engine="python",
+                    header=check_header(filename),
+                )
         else:
             self.main_path = get_dir()
             self.df = data
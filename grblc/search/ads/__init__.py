@@ -4,6 +4,4 @@ __version__ = "0.1.7"
 
 from .search import gcnSearch, litSearch, getArticles
 from .output import savePDF
-from .config import set_apikey, read_apikey, reset_apikey
-
-read_apikey()
+from .config import set_apikey, get_apikey, read_apikey, reset_apikey
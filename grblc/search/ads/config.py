@@ -1,10 +1,32 @@
 import os
+import threading
 from functools import reduce
 from pathlib import Path
 
 from ads import config
 
 
+def get_apikey():
+    """
+    Returns the ADS API key. The key is read from {HOME}/.ads/dev_key the first
+    time it is needed and cached for the rest of the process; use set_apikey()
+    or reset_apikey() to change it.
+
+    :returns:
+        The API key, or None if no key has been set.
+    """
+    global _apikey_loaded
+
+    if not _apikey_loaded:
+        with _apikey_lock:
+            if not _apikey_loaded:
+                read_apikey()
+                # only marked loaded once the token is in place, so no other
+                # thread can skip the lock and see it unset
+                _apikey_loaded = True
+    return config.token
+
+
 def read_apikey():
     """
     Reads in the required API key for APS queries by setting the `ads` package's
@@ -39,14 +61,14 @@ def set_apikey(key):
         No return, but calls _read_apikey() after setting.
     """
     try:
-        os.mkdir(os.path.join(HOME, ".ads"))
+        os.mkdir(os.path.dirname(DEV_KEY_DIR))
     except:
         pass
 
     with open(DEV_KEY_DIR, "w") as f:
         f.write(key)
 
-    read_apikey()
+    _reload_apikey()
 
 
 def reset_apikey():
@@ -61,8 +83,21 @@ def reset_apikey():
     except:
         print(f"No key found in {os.path.split(DEV_KEY_DIR)[0]} to delete.")
 
-    read_apikey()
+    config.token = None
+    _reload_apikey()
+
+
+def _reload_apikey():
+    global _apikey_loaded
+
+    with _apikey_lock:
+        read_apikey()
+        _apikey_loaded = True
+
 
+# whether read_apikey() has been called in this process
+_apikey_loaded = False
+_apikey_lock = threading.Lock()
 
 HOME = Path.home()
 DEV_KEY_DIR = reduce(os.path.join, (HOME, ".ads", "dev_key"))
@@ -7,7 +7,7 @@ import warnings
 import requests
 from ads import SearchQuery
 
-from .config import read_apikey
+from .config import get_apikey
 from .ECHO import SynchronizedEcho
 
 
@@ -137,6 +137,7 @@ def gcnSearch(GRB, keywords=None, printlength=True, debug=False):
     assert isinstance(GRB, str), "GRB is not of type string."
     query = f"bibstem:GCN {getGRBComboQuery(GRB)}"
     keywords = additionalKeywords(keywords)
+    get_apikey()  # make sure `ads` has our key before querying
     finds = list(SearchQuery(q=f"{query + keywords}", fl=["bibcode", "identifier"]))
     if debug:
         ECHO(f"[{GRB}] Query: {query + keywords}")
@@ -171,6 +172,7 @@ def litSearch(GRB, keywords=None, printlength=True, debug=False):
     query = getGRBComboQuery(GRB)
     keywords = additionalKeywords(keywords)
     fullquery = f"title:{query} OR abstract:{query} OR keyword:{query} {keywords} -bibstem:GCN"
+    get_apikey()  # make sure `ads` has our key before querying
     finds = list(SearchQuery(q=fullquery, fl=["bibcode", "identifier", "title", "author", "year"], rows=100))
     if (printlength or debug) and len(finds) > 0:
         ECHO(f"[{GRB}] {len(finds)} found.")
@@ -200,7 +202,7 @@ def getArticle(articlelist, article, GRB, firsttry=True, debug=False):
     if debug:
         ECHO(f"[{GRB}] Retrieving {article.bibcode}")
     isGCN = "GCN" in article.bibcode
-    header = {"Authorization": f"Bearer {read_apikey()}"}
+    header = {"Authorization": f"Bearer {get_apikey()}"}
     # Ask ADS to redirect us to the journal article.
     params = {"bibcode": article.bibcode}
     if isGCN:
@@ -1,6 +1,15 @@
+import io
 import os
 
-__all__ = ["set_dir", "get_dir"]
+import numpy as np
+
+__all__ = ["set_dir", "get_dir", "open_text", "read_columnar"]
+
+# extensions of compressed files that can be read transparently with `open_text`
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+
+# extensions of columnar (Parquet and Feather/Arrow IPC) tables, read with `read_columnar`
+COLUMNAR_SUFFIXES = (".parquet", ".feather", ".arrow")
 
 # small setter to set the main conversion directory
 def set_dir(dir):
@@ -14,4 +23,108 @@ def get_dir():
     global directory
     return directory
 
+
+def str_array(values):
+    """
+    Returns ``values`` (e.g. a pandas column) as a NumPy array of strings.
+    Missing values become ``"nan"``.
+    """
+    # Series.to_numpy(dtype=str) truncates every string to one character when
+    # a pandas string column has missing values, so go through object first
+    return np.asarray(values, dtype=object).astype(str)
+
+
+def strip_compression(path):
+    """
+    Returns ``path`` without a trailing compression extension, e.g.
+    ``050525A_magnitude.txt.gz`` -> ``050525A_magnitude.txt``.
+    """
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.lower().endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def open_text(path, encoding="utf-8"):
+    """
+    Opens a text file for reading, decompressing ``.gz``, ``.bz2``, ``.xz``
+    and ``.zst`` files on the fly based on their extension. Data is
+    decompressed in blocks as it is read, so memory use does not grow with
+    the file size.
+
+    ``.zst`` files require the optional ``zstandard`` package.
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".gz":
+        import gzip
+
+        return gzip.open(path, "rt", encoding=encoding)
+    elif ext == ".bz2":
+        import bz2
+
+        return bz2.open(path, "rt", encoding=encoding)
+    elif ext == ".xz":
+        import lzma
+
+        return lzma.open(path, "rt", encoding=encoding)
+    elif ext == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                f"Reading {path} requires the `zstandard` package. "
+                "Install it with `pip install zstandard`."
+            )
+
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, encoding=encoding)
+
+    return open(path, encoding=encoding)
+
+
+def is_columnar(path):
+    """
+    Returns whether ``path`` is a Parquet or Feather/Arrow IPC table, based on
+    its extension.
+    """
+    return path.lower().endswith(COLUMNAR_SUFFIXES)
+
+
+def import_pyarrow():
+    """
+    Imports the optional ``pyarrow`` package, which reading and writing
+    columnar tables requires.
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet and Feather tables require the `pyarrow` package. "
+            "Install it with `pip install pyarrow`."
+        )
+    return pyarrow
+
+
+def read_columnar(path, columns=None):
+    """
+    Reads a Parquet (``.parquet``) or Feather/Arrow IPC (``.feather``,
+    ``.arrow``) table into a :py:class:`pandas.DataFrame`. Columns keep the
+    types they were written with, so nothing is parsed. Feather files are
+    memory-mapped.
+
+    Requires the optional ``pyarrow`` package.
+    """
+    import_pyarrow()
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, columns=columns).to_pandas()
+
+    import pyarrow.feather as feather
+
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
 directory = os.getcwd()
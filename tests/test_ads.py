@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Tests for API key handling in `grblc.search.ads`."""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from grblc.search.ads import config
+
+
+class TestApiKey(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.key_path = os.path.join(self._tmp.name, "dev_key")
+        with open(self.key_path, "w") as f:
+            f.write("abc123")
+
+        self._patches = [
+            mock.patch.object(config, "DEV_KEY_DIR", self.key_path),
+            mock.patch.object(config, "_apikey_loaded", False),
+            mock.patch.object(config.config, "token", None),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self._patches:
+            p.stop()
+        self._tmp.cleanup()
+
+    def test_key_read_once(self):
+        with mock.patch("builtins.open", wraps=open) as opened:
+            self.assertEqual(config.get_apikey(), "abc123")
+            self.assertEqual(config.get_apikey(), "abc123")
+        self.assertEqual(opened.call_count, 1)
+
+    def test_concurrent_first_read(self):
+        # a slow key file leaves time for other threads to race the first read
+        real_open = open
+
+        def slow_open(*args, **kwargs):
+            time.sleep(0.05)
+            return real_open(*args, **kwargs)
+
+        barrier = threading.Barrier(8)
+        keys = []
+
+        def worker():
+            barrier.wait()
+            keys.append(config.get_apikey())
+
+        with mock.patch.object(config, "read_apikey", wraps=config.read_apikey) as read, \
+                mock.patch("builtins.open", side_effect=slow_open):
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(keys, ["abc123"] * 8)
+        self.assertEqual(read.call_count, 1)
+
+    def test_set_and_reset(self):
+        self.assertEqual(config.get_apikey(), "abc123")
+
+        config.set_apikey("xyz789")
+        self.assertEqual(config.get_apikey(), "xyz789")
+
+        config.reset_apikey()
+        self.assertIsNone(config.get_apikey())
+
+
+if __name__ == "__main__":
+    unittest.main()
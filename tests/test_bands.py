@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Tests for `grblc.convert.bands`."""
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+from grblc.convert import bands
+from grblc.convert import constants
+from grblc.convert.bands import BAND_NAMES
+from grblc.convert.bands import band_code
+from grblc.convert.bands import band_codes
+from grblc.convert.bands import normalize_band
+
+
+def slow_code(band, source="manual"):
+    name = normalize_band(band, source)
+    return BAND_NAMES.index(name) if name in BAND_NAMES else -1
+
+
+class TestBands(unittest.TestCase):
+    def test_spellings(self):
+        for band, source, name in (
+            ("R", "manual", "R"),
+            ("R_c", "manual", "Rc"),
+            ("V(ab)", "manual", "V"),
+            ("g'", "manual", "g"),
+            ("K_s", "manual", "Ks"),
+            ("v", "manual", "V"),
+            ("v", "uvot", "v_swift"),
+            ("w1", "uvot", "uvw1_swift"),
+            ("uvm2", "uvot", "uvm2_swift"),
+        ):
+            self.assertEqual(BAND_NAMES[band_code(band, source)], name, (band, source))
+
+        self.assertEqual(band_code("not_a_band"), -1)
+        self.assertEqual(band_code("w1"), -1)
+
+    def test_aliases_match_normalize_band(self):
+        # the precomputed aliases are a shortcut, never a different answer
+        for uvot, aliases in bands._get_aliases().items():
+            source = "uvot" if uvot else "manual"
+            for spelling, code in aliases.items():
+                self.assertEqual(code, slow_code(spelling, source), (spelling, source))
+
+    def test_band_codes(self):
+        rng = np.random.default_rng(0)
+        spellings = ["R", "R_c", "V(Vega)", "w2", "b", "z'", "H", "Y", "Rc(2)", "?", "uvw1"]
+        band = rng.choice(spellings, 500)
+        source = rng.choice(["manual", "uvot", "other"], 500)
+
+        expected = [slow_code(b, s) for b, s in zip(band, source)]
+        np.testing.assert_array_equal(band_codes(band, source), expected)
+        np.testing.assert_array_equal(
+            band_codes(band.reshape(20, 25), "uvot"),
+            np.reshape([slow_code(b, "uvot") for b in band], (20, 25)),
+        )
+
+
+class TestBandTable(unittest.TestCase):
+    def test_table(self):
+        table = bands.get_band_table()
+        self.assertEqual(len(table), len(BAND_NAMES) + 1)
+        self.assertFalse(table.flags.writeable)
+
+        sf11 = constants.ebv2A_b_df["3.1"]
+        for code, name in enumerate(BAND_NAMES):
+            wavelength, zero_point, bandpass = constants.photometry[name]
+            row = table[code]
+            self.assertEqual(
+                (row["name"], row["wavelength"], row["zero_point"], row["bandpass"]),
+                (name, wavelength, zero_point, bandpass),
+            )
+            if bandpass in sf11:
+                self.assertEqual(row["sf11"], sf11[bandpass])
+            else:
+                self.assertTrue(np.isnan(row["sf11"]))
+
+        # unsupported bands index the last row
+        codes = band_codes(["R", "not_a_band"])
+        self.assertEqual(table["wavelength"][codes][0], constants.photometry["R"][0])
+        self.assertTrue(np.isnan(table["wavelength"][codes][1]))
+
+    def test_lazy_sf11_table(self):
+        code = (
+            "import grblc.convert, grblc.convert.constants as c;"
+            "assert 'ebv2A_b_df' not in vars(c);"
+            "assert grblc.convert.ebv2A_b_df is c.ebv2A_b_df"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
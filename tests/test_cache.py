@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Tests for `grblc.convert.cache`."""
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from grblc.convert import cache as cache_module
+from grblc.convert import convert
+from grblc.convert.cache import ExtinctionCache
+
+
+def _put_from_child(path, ra, dec, ebv):
+    ExtinctionCache(path).put(ra, dec, ebv)
+
+
+class TestExtinctionCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_roundtrip(self):
+        cache = ExtinctionCache(self.path)
+        self.assertIsNone(cache.get(278.1357, 26.3396))
+
+        cache.put(278.1357, 26.3396, 0.0953)
+        self.assertEqual(cache.get(278.1357, 26.3396), 0.0953)
+        # positions are quantized, and values from different maps are kept apart
+        self.assertEqual(cache.get(278.1357000001, 26.3396), 0.0953)
+        self.assertIsNone(cache.get(278.1357, 26.3396, "sfd_healpix_1024"))
+        cache.close()
+
+        # persists on disk
+        cache = ExtinctionCache(self.path)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get(278.1357, 26.3396), 0.0953)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_shared_between_processes(self):
+        cache = ExtinctionCache(self.path)
+        cache.put(10.0, -20.0, 0.5)
+
+        ctx = multiprocessing.get_context("spawn")
+        procs = [
+            ctx.Process(target=_put_from_child, args=(self.path, 10.0 + i, 5.0, 0.1 * i))
+            for i in range(4)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+            self.assertEqual(p.exitcode, 0)
+
+        self.assertEqual(len(cache), 5)
+        self.assertEqual(cache.get(13.0, 5.0), 0.1 * 3)
+        cache.close()
+
+    def test_default_path(self):
+        with mock.patch("grblc.convert.sfd.std_paths.data_dir", return_value=self._tmp.name):
+            self.assertEqual(
+                ExtinctionCache().path, os.path.join(self._tmp.name, "extinction_cache.sqlite")
+            )
+
+    def test_unusable_database(self):
+        # its directory can't be created, since a file is in the way
+        blocker = os.path.join(self._tmp.name, "file")
+        with open(blocker, "w"):
+            pass
+        cache = ExtinctionCache(os.path.join(blocker, "cache.sqlite"))
+        self.assertRaises(sqlite3.Error, cache.get, 10.0, -20.0)
+        self.assertRaises(sqlite3.Error, cache.put, 10.0, -20.0, 0.5)
+
+    def test_ebv_without_cache(self):
+        blocker = os.path.join(self._tmp.name, "file")
+        with open(blocker, "w"):
+            pass
+        cache = ExtinctionCache(os.path.join(blocker, "cache.sqlite"))
+        query = mock.Mock()
+        query.query_equ_array.return_value = 0.25
+
+        # the dust map is queried directly when the cache can't be used
+        with mock.patch.object(cache_module, "_extinction_cache", cache), \
+                mock.patch("grblc.convert.sfd.get_sfd_query", return_value=query), \
+                mock.patch.object(convert, "_cache_error_reported", False), \
+                mock.patch("builtins.print") as printed:
+            self.assertEqual(convert._ebv("", "10:00:00", "+20:00:00"), 0.25)
+            self.assertEqual(convert._ebv("", "10:00:00", "+20:00:00"), 0.25)
+        self.assertEqual(query.query_equ_array.call_count, 2)
+        self.assertEqual(printed.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Tests for `grblc.convert.catalog`."""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from grblc.convert import catalog
+
+
+class TestGRBCatalog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = catalog.get_grb_catalog()
+        cls.table = pd.read_csv(
+            catalog.GRB_ATTRS_PATH,
+            delimiter="\t+|\\s+",
+            index_col=0,
+            header=0,
+            engine="python",
+        )
+
+    def test_names(self):
+        self.assertEqual(catalog.normalize_grb_name("GRB 050525a"), "050525A")
+        self.assertEqual(catalog.normalize_grb_name("grb_980326"), "980326")
+        self.assertEqual(catalog.normalize_grb_name("not a grb"), "not a grb")
+        self.assertIn("GRB 980326", self.catalog)
+        self.assertRaises(KeyError, self.catalog.index, "999999Z")
+        self.assertIs(catalog.get_grb_catalog(), self.catalog)
+
+    def test_matches_table(self):
+        self.assertEqual(len(self.catalog), len(self.table))
+        for name in self.table.index[::50]:
+            row = self.table.loc[name]
+            entry = self.catalog[name]
+            for column in ("photon_index", "photon_index_err", "T90", "z"):
+                np.testing.assert_equal(entry[column], float(row[column]))
+            self.assertEqual(
+                self.catalog.trigger_of(name), f"{row['trigger_date']} {row['trigger_time']}")
+
+    def test_positions(self):
+        ra, dec = self.catalog.position_of("980326")
+        self.assertAlmostEqual(ra, 15 * (8 + 36 / 60 + 34.28 / 3600))
+        self.assertAlmostEqual(dec, -(18 + 51 / 60 + 23.9 / 3600))
+
+        deg = catalog.sexagesimal_to_deg(["-00:30:00", "+10:00:36", "n/a", None])
+        np.testing.assert_array_equal(deg[:2], [-0.5, 10.01])
+        self.assertTrue(np.isnan(deg[2:]).all())
+
+    def test_photon_index(self):
+        self.assertEqual(self.catalog.photon_index_of("980326"), (2.1, 0.13))
+        missing = self.catalog.names[np.isnan(self.catalog.photon_index)]
+        if len(missing):
+            self.assertRaises(KeyError, self.catalog.photon_index_of, missing[0])
+
+    def test_lightcurve(self):
+        from grblc.fitting import Lightcurve
+
+        lc = Lightcurve(xdata=[1, 2], ydata=[-10, -11], yerr=[0.1, 0.1], name="GRB 980326")
+        self.assertEqual(lc.catalog_entry["z"], 1.0)
+        lc.name = "unknown grb"
+        self.assertIsNone(lc.catalog_entry)
+
+
+if __name__ == "__main__":
+    unittest.main()
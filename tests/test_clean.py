@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""Tests for `grblc.convert.clean`."""
+import importlib.util
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from grblc.convert.clean import clean_grbs
+from grblc.convert.clean import dedupe_times
+
+
+class TestDedupeTimes(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "time_sec": [10.0, 20.0, 10.0, 30.0, 30.0],
+                "flux": [1.0, 5.0, 3.0, 2.0, 4.0],
+                "flux_err": [1.0, 1.0, 1.0, 0.0, 1.0],
+                "band": ["R", "V", "B", "g", "r"],
+            }
+        )
+
+    def test_first(self):
+        out = dedupe_times(self.df, "first")
+        np.testing.assert_array_equal(out["time_sec"], [10.0, 20.0, 30.0])
+        np.testing.assert_array_equal(out["flux"], [1.0, 5.0, 2.0])
+        np.testing.assert_array_equal(out["band"], ["R", "V", "g"])
+
+    def test_mean(self):
+        out = dedupe_times(self.df, "mean")
+        np.testing.assert_array_equal(out["time_sec"], [10.0, 20.0, 30.0])
+        np.testing.assert_allclose(out["flux"], [2.0, 5.0, 3.0])
+        np.testing.assert_allclose(out["flux_err"], [np.sqrt(2) / 2, 1.0, 0.5])
+        np.testing.assert_array_equal(out["band"], ["R", "V", "g"])
+
+    def test_weighted(self):
+        df = self.df.copy()
+        df.loc[2, "flux_err"] = 2.0
+        out = dedupe_times(df, "weighted")
+        # weights 1 and 1/4 at t=10
+        np.testing.assert_allclose(out["flux"][0], (1.0 + 3.0 / 4) / 1.25)
+        np.testing.assert_allclose(out["flux_err"][0], 1 / np.sqrt(1.25))
+        # the point without an error makes t=30 fall back to the plain mean
+        np.testing.assert_allclose(out["flux"][2], 3.0)
+        np.testing.assert_allclose(out["flux_err"][2], 0.5)
+
+    def test_weighted_nan_errors(self):
+        df = pd.DataFrame(
+            {
+                "time_sec": [10.0, 10.0, 20.0, 30.0, 30.0],
+                "flux": [1.0, 3.0, 5.0, 2.0, 4.0],
+                "flux_err": [1.0, np.nan, np.nan, 1.0, 2.0],
+            }
+        )
+        out = dedupe_times(df, "weighted")
+        # a NaN error counts as no error, so t=10 falls back to the plain mean
+        np.testing.assert_allclose(out["flux"], [2.0, 5.0, (2.0 + 4.0 / 4) / 1.25])
+        # and a point alone at its time is kept as it is
+        self.assertTrue(np.isnan(out["flux_err"][1]))
+        self.assertTrue(np.isfinite(out["flux"]).all())
+
+    def test_single_points_unchanged(self):
+        df = pd.DataFrame(
+            {"time_sec": [10.0, 20.0], "flux": [0.1, 0.3], "flux_err": [0.07, 0.011]}
+        )
+        for method in ("mean", "weighted"):
+            pd.testing.assert_frame_equal(dedupe_times(df, method), df)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            dedupe_times(self.df, "median")
+
+
+class TestCleanGRBs(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.main_dir = self._tmp.name
+        self.tables = {
+            "050525": pd.DataFrame(
+                {
+                    "time_sec": [10.0, 10.0, 20.0],
+                    "flux": [1.0, 3.0, 2.0],
+                    "flux_err": [1.0, 1.0, 1.0],
+                    "band": ["R", "R", "V"],
+                }
+            ),
+            "980326": pd.DataFrame(
+                {
+                    "time_sec": [-5.0, 0.0, 15.0, 25.0],
+                    "flux": [1.0, 2.0, 3.0, 4.0],
+                    "flux_err": [0.1, 0.1, 0.1, 0.1],
+                    "band": ["B", "B", "B", "R"],
+                }
+            ),
+        }
+        for grb, df in self.tables.items():
+            self._write(grb, df)
+
+    def _write(self, grb, df, suffix=".txt"):
+        grb_dir = os.path.join(self.main_dir, f"{grb}_flux")
+        os.makedirs(grb_dir, exist_ok=True)
+        path = os.path.join(grb_dir, f"{grb}_converted_flux{suffix}")
+        if suffix == ".parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, sep="\t", index=False)
+        return path
+
+    def _cleaned(self, grb, suffix=".txt"):
+        path = os.path.join(self.main_dir, f"{grb}_flux", f"{grb}_converted_flux_cleaned{suffix}")
+        if suffix == ".parquet":
+            return pd.read_parquet(path)
+        return pd.read_csv(path, sep=r"\s+")
+
+    def test_clean(self):
+        summary = clean_grbs(self.main_dir, dedupe="mean")
+
+        out = self._cleaned("050525")
+        np.testing.assert_array_equal(out["time_sec"], [10.0, 20.0])
+        np.testing.assert_allclose(out["flux"], [2.0, 2.0])
+        self.assertEqual(list(out.columns), ["time_sec", "flux", "flux_err", "band"])
+
+        out = self._cleaned("980326")
+        np.testing.assert_array_equal(out["time_sec"], [15.0, 25.0])
+
+        self.assertEqual(summary["totals"], {
+            "points": 7, "unphysical": 2, "duplicates": 1, "kept": 4, "grbs": 2, "errors": 0,
+        })
+        self.assertEqual(summary["grbs"]["980326"]["unphysical"], 2)
+        with open(os.path.join(self.main_dir, "clean_summary.json")) as f:
+            self.assertEqual(json.load(f), summary)
+
+        unphysical = pd.read_csv(os.path.join(self.main_dir, "unphysical_times.txt"), sep="\t", dtype=str)
+        self.assertEqual(list(unphysical["grb"]), ["980326"])
+
+    def test_bad_table(self):
+        self._write("010921", pd.DataFrame({"flux": [1.0]}))
+        summary = clean_grbs(self.main_dir)
+        self.assertIn("error", summary["grbs"]["010921"])
+        self.assertEqual(summary["totals"]["errors"], 1)
+        self.assertEqual(summary["totals"]["kept"], 4)
+
+    def test_unsupported_method(self):
+        with self.assertRaises(ValueError):
+            clean_grbs(self.main_dir, dedupe="median")
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "needs pyarrow")
+    def test_columnar(self):
+        self._write("050525", self.tables["050525"], ".parquet")
+        summary = clean_grbs(self.main_dir)
+        self.assertTrue(summary["grbs"]["050525"]["output"].endswith("_cleaned.parquet"))
+        out = self._cleaned("050525", ".parquet")
+        np.testing.assert_array_equal(out["flux"], [1.0, 2.0])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.main_dir, "050525_flux", "050525_converted_flux_cleaned.txt"))
+        )
+
+    @unittest.skipUnless(
+        multiprocessing.get_start_method() == "fork",
+        "workers need to inherit the test's modules",
+    )
+    def test_parallel(self):
+        serial = clean_grbs(self.main_dir, dedupe="weighted")
+        parallel = clean_grbs(self.main_dir, dedupe="weighted", n_workers=2)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(list(parallel["grbs"]), ["050525", "980326"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,438 @@
+#!/usr/bin/env python
+"""Tests for `grblc.convert`."""
+import gzip
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import astropy.units as u
+import numpy as np
+import pandas as pd
+from astropy.time import Time
+
+from grblc import util
+from grblc.convert import convert
+from grblc.convert.cache import ExtinctionCache
+from grblc.convert.catalog import GRBCatalog
+from grblc.convert.resolver import PositionResolver
+from grblc.fitting import io
+
+
+class TestToFlux(unittest.TestCase):
+    def setUp(self):
+        # extinction is supplied explicitly, so the dust map is never needed
+        patcher = mock.patch.object(convert, "_check_dust_maps")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        rng = np.random.default_rng(0)
+        self.band = np.array(["R", "V", "g'", "R_c", "w1", "uvm2", "Ks", "B"])
+        self.source = np.array(["manual"] * 4 + ["uvot", "uvot"] + ["manual"] * 2)
+        n = len(self.band)
+        self.mag = rng.uniform(14, 22, n)
+        self.magerr = rng.uniform(0, 0.5, n)
+        self.index = rng.uniform(1.5, 2.5, n)
+        self.index_err = rng.uniform(0, 0.3, n)
+        self.A_b = rng.uniform(0, 0.5, n)
+
+    def test_parity(self):
+        expected = convert.toFlux(
+            self.band, self.mag, self.magerr, self.index, self.index_err,
+            A_b=self.A_b, source=self.source,
+        )
+        result = convert.toFluxArray(
+            self.band, self.mag, self.magerr, self.index, self.index_err,
+            A_b=self.A_b, source=self.source,
+        )
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+    def test_unsupported_band(self):
+        with self.assertRaises(KeyError):
+            convert.toFluxArray(["R", "not_a_band"], [15, 16], A_b=0)
+
+
+class TestToFluxMC(unittest.TestCase):
+    setUp = TestToFlux.setUp
+
+    def test_no_errors(self):
+        expected, _ = convert.toFluxArray(
+            self.band, self.mag, photon_index=self.index, A_b=self.A_b, source=self.source)
+        flux, low, high = convert.toFluxMC(
+            self.band, self.mag, photon_index=self.index, A_b=self.A_b, source=self.source,
+            n_samples=10, seed=0)
+        np.testing.assert_allclose(flux, expected, rtol=1e-12)
+        np.testing.assert_allclose(low, 0, atol=1e-12 * expected.max())
+        np.testing.assert_allclose(high, 0, atol=1e-12 * expected.max())
+
+    def test_small_errors(self):
+        # for small errors the percentiles match linear error propagation
+        magerr, index_err = self.magerr / 20, self.index_err / 20
+        expected, expected_err = convert.toFluxArray(
+            self.band, self.mag, magerr, self.index, index_err,
+            A_b=self.A_b, source=self.source)
+        flux, low, high = convert.toFluxMC(
+            self.band, self.mag, magerr, self.index, index_err,
+            A_b=self.A_b, source=self.source, n_samples=40000, seed=1)
+        np.testing.assert_allclose(flux, expected, rtol=1e-3)
+        np.testing.assert_allclose(low, expected_err, rtol=0.05)
+        np.testing.assert_allclose(high, expected_err, rtol=0.05)
+
+    def test_large_errors(self):
+        # flux is lognormal in magnitude, so large errors are skewed upwards
+        flux, low, high = convert.toFluxMC(
+            "R", [18.0, 19.0], 1.0, 2.0, 0.2, A_b=0.1, ebv_rel_err=0.16, seed=2)
+        self.assertTrue(np.all(high > 1.5 * low))
+
+    def test_chunking(self):
+        kwargs = dict(A_b=self.A_b, source=self.source, n_samples=50, seed=3)
+        args = (self.band, self.mag, self.magerr, self.index, self.index_err)
+        whole = convert.toFluxMC(*args, **kwargs)
+        chunked = convert.toFluxMC(*args, max_samples=120, **kwargs)
+        np.testing.assert_array_equal(whole, chunked)
+
+    def test_bad_sample_counts(self):
+        args = (self.band, self.mag, self.magerr, self.index, self.index_err)
+        for kwargs in (
+            dict(n_samples=0),
+            dict(n_samples=-5),
+            dict(n_samples=2.5),
+            dict(max_samples=0),
+            dict(max_samples=1e3 + 0.5),
+        ):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                convert.toFluxMC(*args, A_b=self.A_b, source=self.source, **kwargs)
+
+        # integral floats are fine
+        convert.toFluxMC(*args, A_b=self.A_b, source=self.source, n_samples=10.0)
+
+
+def write_magnitude_table(directory, grb, trigger, n=40, seed=1):
+    """Writes a random magnitude table for ``grb`` to ``directory/<grb>_flux``."""
+    rng = np.random.default_rng(seed)
+    times = (Time(trigger) + np.sort(rng.uniform(60, 2e6, n)) * u.s).iso
+    table = pd.DataFrame({
+        "date": [t.split()[0] for t in times],
+        "time": [t.split()[1] for t in times],
+        "exp": "60",
+        "mag": rng.uniform(16, 23, n),
+        "mag_err": rng.uniform(0.01, 0.4, n),
+        "band": rng.choice(["R", "V", "B", "I", "not_a_band"], n),
+    })
+
+    grb_dir = os.path.join(directory, f"{grb}_flux")
+    os.makedirs(grb_dir, exist_ok=True)
+    table.to_csv(os.path.join(grb_dir, f"{grb}_magnitude.txt"), sep="\t", index=False)
+    return table, os.path.join(grb_dir, f"{grb}_converted_flux.txt")
+
+
+class LocalBackend:
+    """Stand-in for Simbad that records the lookups it gets."""
+
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = []
+
+    def resolve(self, names):
+        self.calls.append(list(names))
+        return {n: self.positions[n] for n in names if n in self.positions}
+
+
+class ConvertTestCase(unittest.TestCase):
+    """Runs conversions in a temporary directory, without the dust map or Simbad."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+        self.cache = ExtinctionCache(os.path.join(self._tmp.name, "cache.sqlite"))
+        self.addCleanup(self.cache.close)
+        self.backend = LocalBackend({})
+        resolver = PositionResolver(backend=self.backend, cache=self.cache)
+
+        for target, value in (
+            ("_check_dust_maps", None),
+            ("_ebv", 0.05),
+            ("get_position_resolver", resolver),
+        ):
+            patcher = mock.patch.object(convert, target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        old_dir = getattr(util, "directory", None)
+        self.addCleanup(setattr, util, "directory", old_dir)
+        util.set_dir(self._tmp.name)
+
+
+class TestConvertGRB(ConvertTestCase):
+    grb = "050525"
+    trigger = "2005-05-25 00:02:53.22"
+
+    def setUp(self):
+        super().setUp()
+        self.table, self.out_path = write_magnitude_table(
+            self._tmp.name, self.grb, self.trigger)
+
+    def test_times(self):
+        convert.convertGRB(self.grb, battime=self.trigger, index=2.0, index_err=0.1)
+        result = pd.read_csv(self.out_path, sep="\t")
+
+        # the same as converting one row at a time
+        supported = self.table[self.table["band"] != "not_a_band"]
+        expected = [
+            round((Time(f"{d} {t}", format="iso") - Time(self.trigger)).sec, 5)
+            for d, t in zip(supported["date"], supported["time"])
+        ]
+        np.testing.assert_array_equal(result["time_sec"], expected)
+        np.testing.assert_array_equal(result["band"], supported["band"])
+
+    def test_table_in_two_directories(self):
+        # a compressed copy higher up doesn't win over the uncompressed table
+        grb_dir = os.path.join(self._tmp.name, f"{self.grb}_flux")
+        nested = os.path.join(grb_dir, "nested")
+        os.mkdir(nested)
+        table_path = os.path.join(grb_dir, f"{self.grb}_magnitude.txt")
+        with open(table_path, "rb") as f, gzip.open(table_path + ".gz", "wb") as gz:
+            gz.write(f.read())
+        os.replace(table_path, os.path.join(nested, f"{self.grb}_magnitude.txt"))
+
+        with self.assertWarnsRegex(UserWarning, "several directories"):
+            summary = convert.convertGRB(self.grb, battime=self.trigger, index=2.0)
+        self.assertEqual(
+            summary["path"], os.path.join(nested, f"{self.grb}_converted_flux.txt"))
+
+    def test_catalog_attributes(self):
+        # without battime/index, the trigger and photon index come from the GRB catalog
+        convert.convertGRB(self.grb)
+        result = pd.read_csv(self.out_path, sep="\t")
+
+        attrs = convert.get_grb_catalog()[self.grb]
+        trigger = Time(f"{attrs['trigger_date']} {attrs['trigger_time']}")
+        supported = self.table[self.table["band"] != "not_a_band"]
+        first = Time(f"{supported['date'].iloc[0]} {supported['time'].iloc[0]}")
+        self.assertAlmostEqual(result["time_sec"].iloc[0], (first - trigger).sec, places=4)
+
+        self.assertEqual(convert._ebv.call_args.args[0], self.grb)
+
+    def test_ftol(self):
+        convert.convertGRB(self.grb, battime=self.trigger, index=2.0, index_err=0.1, ftol=0.2)
+        result = pd.read_csv(self.out_path, sep="\t")
+        self.assertTrue(len(result) > 0)
+        self.assertTrue((result["flux_err"] / result["flux"] <= 0.2).all())
+
+    def test_chunksize(self):
+        kwargs = dict(battime=self.trigger, index=2.0, index_err=0.1, ftol=0.3)
+        for debug in (False, True):
+            whole = convert.convertGRB(self.grb, debug=debug, **kwargs)
+            with open(whole["path"]) as f:
+                expected = f.read()
+
+            # streaming gives the same output, whatever the chunk boundaries
+            for chunksize in (1, 7, 1000):
+                summary = convert.convertGRB(self.grb, debug=debug, chunksize=chunksize, **kwargs)
+                with open(summary["path"]) as f:
+                    self.assertEqual(f.read(), expected)
+                self.assertEqual(summary, whole)
+
+        self.assertFalse(any(f.endswith(".tmp") for f in os.listdir(os.path.dirname(self.out_path))))
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "needs pyarrow")
+    def test_output_format(self):
+        kwargs = dict(battime=self.trigger, index=2.0, index_err=0.1)
+        text = convert.convertGRB(self.grb, **kwargs)
+        expected = pd.read_csv(text["path"], sep="\t")
+
+        for output_format in ("parquet", "feather"):
+            summary = convert.convertGRB(
+                self.grb, output_format=output_format, chunksize=7, **kwargs)
+            self.assertTrue(summary["path"].endswith(f"_converted_flux.{output_format}"))
+
+            # typed columns with the same values as the text table
+            result = util.read_columnar(summary["path"])
+            self.assertEqual(list(result.columns), ["time_sec", "flux", "flux_err", "band"])
+            for column in ("time_sec", "flux", "flux_err"):
+                self.assertEqual(result[column].dtype, np.float64)
+                np.testing.assert_allclose(result[column], expected[column], rtol=1e-14)
+            np.testing.assert_array_equal(result["band"], expected["band"])
+
+            # and the fitting readers understand it
+            pd.testing.assert_frame_equal(
+                io.read_data(summary["path"]), io.read_data(text["path"]), rtol=1e-14)
+
+        self.assertRaises(ValueError, convert.convertGRB, self.grb, output_format="csv", **kwargs)
+
+    def test_skip_unchanged(self):
+        kwargs = dict(battime=self.trigger, index=2.0, index_err=0.1, skip_unchanged=True)
+        first = convert.convertGRB(self.grb, **kwargs)
+        self.assertFalse(first["unchanged"])
+
+        second = convert.convertGRB(self.grb, **kwargs)
+        self.assertTrue(second["unchanged"])
+        self.assertEqual(second["converted"], first["converted"])
+
+        # any change to the inputs or options reconverts
+        self.assertFalse(convert.convertGRB(self.grb, **dict(kwargs, index=2.1))["unchanged"])
+        self.assertFalse(convert.convertGRB(self.grb, **dict(kwargs, ftol=0.2))["unchanged"])
+        self.assertTrue(convert.convertGRB(self.grb, **dict(kwargs, ftol=0.2))["unchanged"])
+
+    def test_band_lookups(self):
+        # bands are looked up once per chunk
+        with mock.patch.object(convert, "band_codes", wraps=convert.band_codes) as band_codes:
+            convert.convertGRB(self.grb, battime=self.trigger, index=2.0, chunksize=15)
+        self.assertEqual(band_codes.call_count, 3)
+
+    def test_nothing_to_convert(self):
+        table = self.table.assign(band="not_a_band")
+        table.to_csv(os.path.join(self._tmp.name, f"{self.grb}_flux", f"{self.grb}_magnitude.txt"),
+                     sep="\t", index=False)
+
+        summary = convert.convertGRB(self.grb, battime=self.trigger, index=2.0, chunksize=15)
+        self.assertEqual(summary["converted"], 0)
+        self.assertEqual(summary["unsupported_bands"], ["notaband"])
+        convert._ebv.assert_not_called()
+        self.assertEqual(len(pd.read_csv(self.out_path, sep="\t")), 0)
+
+    def test_skip_unchanged_position(self):
+        kwargs = dict(battime=self.trigger, index=2.0, index_err=0.1, skip_unchanged=True)
+
+        def convert_at(position):
+            # a new process, with a catalog giving the GRB another position
+            resolver = PositionResolver(backend=self.backend, cache=self.cache)
+            with mock.patch.object(GRBCatalog, "position_of", return_value=position), \
+                    mock.patch.object(convert, "get_position_resolver", return_value=resolver):
+                return convert.convertGRB(self.grb, **kwargs)
+
+        self.assertFalse(convert_at((10.0, 20.0))["unchanged"])
+        self.assertTrue(convert_at((10.0, 20.0))["unchanged"])
+        self.assertFalse(convert_at((10.0, 21.0))["unchanged"])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "needs pyarrow")
+    def test_skip_unchanged_formats(self):
+        kwargs = dict(battime=self.trigger, index=2.0, index_err=0.1, skip_unchanged=True)
+        text = convert.convertGRB(self.grb, **kwargs)
+        parquet = convert.convertGRB(self.grb, output_format="parquet", **kwargs)
+        self.assertFalse(parquet["unchanged"])
+        self.assertTrue(os.path.exists(text["path"] + ".manifest.json"))
+        self.assertTrue(os.path.exists(parquet["path"] + ".manifest.json"))
+
+        # each format keeps its own manifest, so neither is reconverted
+        self.assertTrue(convert.convertGRB(self.grb, **kwargs)["unchanged"])
+        self.assertTrue(
+            convert.convertGRB(self.grb, output_format="parquet", **kwargs)["unchanged"]
+        )
+
+
+class TestConvertAll(ConvertTestCase):
+    def setUp(self):
+        super().setUp()
+        self.grbs = {"050525": "2005-05-25 00:02:53", "980326": "1998-03-26 21:18:53"}
+        for i, (grb, trigger) in enumerate(self.grbs.items()):
+            write_magnitude_table(self._tmp.name, grb, trigger, seed=i)
+
+        # not in the GRB catalog
+        write_magnitude_table(self._tmp.name, "999999Z", "2020-01-01 00:00:00")
+        # unreadable table
+        bad_dir = os.path.join(self._tmp.name, "010921_flux")
+        os.mkdir(bad_dir)
+        with open(os.path.join(bad_dir, "010921_magnitude.txt"), "w") as f:
+            f.write("date\ttime\texp\tmag\tmag_err\tband\nx\ty\t1\tbright\t0.1\tR\n")
+
+    def _statuses(self, report):
+        return dict(zip(report["GRB"], report["status"]))
+
+    def test_report(self):
+        report = convert.convert_all()
+
+        self.assertEqual(self._statuses(report), {
+            "050525": "converted", "980326": "converted",
+            "999999Z": "unsupported", "010921": "error",
+        })
+        row = report.set_index("GRB").loc["050525"]
+        self.assertEqual(row["points"], 40)
+        self.assertEqual(row["converted"] + row["skipped"], 40)
+        self.assertEqual(len(row["unsupported_bands"].split(",")), 1)
+
+        saved = pd.read_csv(os.path.join(self._tmp.name, "convert_report.tsv"), sep="\t")
+        self.assertEqual(self._statuses(saved), self._statuses(report))
+        with open(os.path.join(self._tmp.name, "unsupported.txt")) as f:
+            self.assertEqual(f.read(), "999999Z")
+
+    def test_missing_dependency(self):
+        # a missing package is an error, not an unsupported GRB
+        with mock.patch.object(
+            convert, "_open_writer", side_effect=ImportError("No module named 'pyarrow'")
+        ):
+            report = convert.convert_all()
+        statuses = self._statuses(report)
+        self.assertEqual(statuses["050525"], "error")
+        self.assertEqual(statuses["999999Z"], "unsupported")
+        row = report.set_index("GRB").loc["050525"]
+        self.assertEqual(row["error"], "ImportError: No module named 'pyarrow'")
+
+    def test_batched_positions(self):
+        self.backend.positions["050525"] = (10.0, 20.0)
+        with mock.patch.object(GRBCatalog, "position_of", return_value=None):
+            convert.convert_all()
+            # every catalogued GRB without a position is looked up at once
+            self.assertEqual(self.backend.calls, [["010921", "050525", "980326"]])
+            self.assertEqual(self.cache.get_position("050525"), (10.0, 20.0))
+
+            # and a later run (a new process) doesn't ask about them again,
+            # whether or not they were found
+            resolver = PositionResolver(backend=self.backend, cache=self.cache)
+            with mock.patch.object(convert, "get_position_resolver", return_value=resolver):
+                convert.convert_all(force=True)
+            self.assertEqual(len(self.backend.calls), 1)
+
+    def test_resume(self):
+        convert.convert_all()
+        with open(os.path.join(self._tmp.name, "convert_all.checkpoint")) as f:
+            self.assertEqual(sorted(f.read().split()), sorted(self.grbs))
+
+        with mock.patch.object(convert, "convertGRB", wraps=convert.convertGRB) as convertGRB:
+            report = convert.convert_all(resume=True)
+            converted = sorted(c.args[0] for c in convertGRB.call_args_list)
+        self.assertEqual(converted, ["010921", "999999Z"])
+        self.assertEqual(self._statuses(report)["980326"], "checkpoint")
+
+    def test_unchanged(self):
+        convert.convert_all()
+        report = convert.convert_all()
+        self.assertEqual(self._statuses(report)["050525"], "unchanged")
+        self.assertEqual(self._statuses(report)["999999Z"], "unsupported")
+        # the stored summary is reported for skipped tables
+        row = report.set_index("GRB").loc["050525"]
+        self.assertEqual(row["points"], 40)
+
+        # editing a table only reconverts that GRB
+        write_magnitude_table(self._tmp.name, "980326", self.grbs["980326"], seed=5)
+        statuses = self._statuses(convert.convert_all())
+        self.assertEqual(statuses["050525"], "unchanged")
+        self.assertEqual(statuses["980326"], "converted")
+
+        # so does a missing output
+        os.remove(os.path.join(self._tmp.name, "050525_flux", "050525_converted_flux.txt"))
+        self.assertEqual(self._statuses(convert.convert_all())["050525"], "converted")
+
+        statuses = self._statuses(convert.convert_all(force=True))
+        self.assertEqual(statuses["050525"], "converted")
+        self.assertEqual(statuses["980326"], "converted")
+
+    @unittest.skipUnless(
+        multiprocessing.get_start_method() == "fork",
+        "workers need to inherit the test's patches",
+    )
+    def test_parallel(self):
+        serial = self._statuses(convert.convert_all())
+        parallel = convert.convert_all(n_workers=2, force=True)
+        self.assertEqual(self._statuses(parallel), serial)
+
+        for grb in self.grbs:
+            path = os.path.join(self._tmp.name, f"{grb}_flux", f"{grb}_converted_flux.txt")
+            self.assertTrue(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""Tests for `grblc.convert.dirindex`."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from grblc.convert import dirindex
+from grblc.convert.dirindex import DirectoryIndex
+
+
+class TestDirectoryIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        for path in (
+            "050525_flux/050525_magnitude.txt",
+            "050525_flux/050525_converted_flux.txt",
+            "980326_flux/980326_magnitude.txt.gz",
+            "980326_flux/nested/980326_magnitude.txt",
+            "notes.txt",
+            ".hidden/050525_magnitude.txt",
+        ):
+            self._touch(path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch(self, path):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("")
+
+    def _rel(self, paths):
+        return [os.path.relpath(p, self.root) for p in paths]
+
+    def test_glob(self):
+        index = DirectoryIndex(self.root)
+        self.assertEqual(self._rel(index.glob("*_flux/*.txt")), [
+            "050525_flux/050525_converted_flux.txt",
+            "050525_flux/050525_magnitude.txt",
+        ])
+        self.assertEqual(self._rel(index.glob("**/*_magnitude.txt")), [
+            "050525_flux/050525_magnitude.txt",
+            "980326_flux/nested/980326_magnitude.txt",
+        ])
+        self.assertIn("notes.txt", self._rel(index.glob("**/*.txt")))
+        self.assertEqual(len(index.files()), 5)
+
+    def test_find(self):
+        index = DirectoryIndex(self.root)
+        self.assertEqual(
+            self._rel(index.find("980326_magnitude.txt", "980326_magnitude.txt.gz")),
+            ["980326_flux/980326_magnitude.txt.gz", "980326_flux/nested/980326_magnitude.txt"],
+        )
+
+        # a missing or moved file triggers a refresh
+        self._touch("999999Z_flux/999999Z_magnitude.txt")
+        self.assertEqual(len(index.find("999999Z_magnitude.txt")), 1)
+        os.rename(
+            os.path.join(self.root, "999999Z_flux", "999999Z_magnitude.txt"),
+            os.path.join(self.root, "999999Z_magnitude.txt"),
+        )
+        self.assertEqual(self._rel(index.find("999999Z_magnitude.txt")), ["999999Z_magnitude.txt"])
+
+    def test_incremental_refresh(self):
+        index = DirectoryIndex(self.root)
+
+        # once directories are old enough, a refresh only lists changed ones
+        with mock.patch.object(dirindex, "_RACY_SECONDS", 0.0):
+            index.refresh()
+            with mock.patch.object(index, "_scan", wraps=index._scan) as scan:
+                self.assertFalse(index.refresh())
+                self.assertEqual(scan.call_count, 0)
+
+                os.remove(os.path.join(self.root, "050525_flux", "050525_converted_flux.txt"))
+                self.assertTrue(index.refresh())
+                self.assertEqual([c.args[0] for c in scan.call_args_list], ["050525_flux/"])
+        self.assertEqual(self._rel(index.glob("050525_flux/*")), ["050525_flux/050525_magnitude.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
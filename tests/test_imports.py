@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""Tests that importing `grblc` subpackages doesn't load heavy optional stacks."""
+import subprocess
+import sys
+import unittest
+
+
+def _loaded_after(statement, modules):
+    code = (
+        f"import sys; {statement}; "
+        f"print(','.join(m for m in {list(modules)!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+class TestLazyImports(unittest.TestCase):
+    heavy = ("plotly", "IPython", "matplotlib", "lmfit")
+
+    def test_fitting_is_lazy(self):
+        self.assertEqual(_loaded_after("import grblc.fitting", self.heavy), [])
+
+    def test_lazy_attribute(self):
+        loaded = _loaded_after(
+            "import grblc.fitting; grblc.fitting.Lightcurve", self.heavy
+        )
+        self.assertNotIn("plotly", loaded)
+        self.assertNotIn("IPython", loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""Tests for `grblc.fitting.io`."""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from grblc.fitting import io
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+        rng = np.random.default_rng(42)
+        self.lcs = {}
+        for grb, n in (("050525A", 12), ("060210", 1), ("980326", 40)):
+            t = np.sort(rng.uniform(1e2, 1e6, n))
+            f = rng.uniform(1e-13, 1e-10, n)
+            self.lcs[grb] = pd.DataFrame({"time_sec": t, "flux": f, "flux_err": 0.1 * f})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_roundtrip(self):
+        path = io.write_archive(os.path.join(self.tmp, "lcs.grbarc"), self.lcs)
+
+        with io.read_archive(path) as archive:
+            self.assertEqual(sorted(archive.names), sorted(self.lcs))
+            for grb, df in self.lcs.items():
+                pd.testing.assert_frame_equal(archive[grb], df)
+                pd.testing.assert_frame_equal(archive.read_data(grb), io._to_log(df))
+
+            with self.assertRaises(KeyError):
+                archive["000000"]
+
+    def test_text_conversion(self):
+        textdir = os.path.join(self.tmp, "text")
+        os.makedirs(textdir)
+        paths = []
+        for grb, df in self.lcs.items():
+            paths.append(os.path.join(textdir, f"{grb}_Oates.txt"))
+            oates = pd.DataFrame(
+                {
+                    "time": df["time_sec"],
+                    "flux": df["flux"],
+                    "maxflux": df["flux"] + 1.65 * df["flux_err"],
+                    "minflux": df["flux"] - 1.65 * df["flux_err"],
+                }
+            )
+            oates.to_csv(paths[-1], sep="\t", index=False)
+
+        archive_path = io.pack_archive(paths, os.path.join(self.tmp, "lcs.grbarc"))
+        unpacked = io.unpack_archive(archive_path, os.path.join(self.tmp, "unpacked"))
+
+        self.assertEqual(len(unpacked), len(self.lcs))
+        for path in unpacked:
+            grb = os.path.split(path)[-1].split("_")[0]
+            np.testing.assert_allclose(
+                io.read_data(path).to_numpy(), io._to_log(self.lcs[grb]).to_numpy()
+            )
+
+    def test_close(self):
+        path = io.write_archive(os.path.join(self.tmp, "lcs.grbarc"), self.lcs)
+        archive = io.read_archive(path)
+        grb = next(iter(self.lcs))
+        flux = archive.get(grb)["flux"]
+        archive.close()
+        archive.close()
+
+        # handed out arrays stay valid, but the archive can't be read anymore
+        np.testing.assert_array_equal(flux, self.lcs[grb]["flux"])
+        with self.assertRaisesRegex(ValueError, "archive is closed"):
+            archive.get(grb)
+        with self.assertRaisesRegex(ValueError, "archive is closed"):
+            archive[grb]
+
+        # with no arrays left, the mapping is closed right away
+        with io.read_archive(path) as archive:
+            mm = archive._mm
+        self.assertTrue(mm.closed)
+
+    def test_bad_file(self):
+        path = os.path.join(self.tmp, "junk.grbarc")
+        with open(path, "wb") as f:
+            f.write(b"not an archive at all, no sir")
+
+        with self.assertRaises(ValueError):
+            io.read_archive(path)
+
+
+class TestReaders(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+        io.unregister_reader("mysurvey")
+
+    def test_check_datatype(self):
+        expected = {
+            "050525A_Zaninoni.txt": "zaninoni",
+            "050525A_Si.txt": "si",
+            "050525A_liang.txt": "liang",
+            "050525A_kann.txt": "kann",
+            "050525.txt": "kann",
+            "050525A_combined.txt": "combined",
+            "050525A_combinedrest.txt": "combinedrest",
+            "050525A_Oates.txt": "oates",
+            "050525A_block.txt": "wczytywanie",
+            "050525A_other.txt": "si",
+        }
+        for filename, datatype in expected.items():
+            self.assertEqual(io.check_datatype(filename.lower()), datatype, filename)
+
+    def test_transform(self):
+        df = pd.DataFrame(
+            {"t": [10.0, 100.0], "f": [2.0, 1.0], "mx": [2.33, 1.33], "mn": [1.0, 0.67]}
+        )
+        out = io.get_reader("oates").read(df)
+        np.testing.assert_allclose(out["flux_err"], (df["mx"] - df["mn"]) / 3.3)
+
+        with self.assertRaises(ValueError):
+            io.get_reader("wczytywanie").read(df)
+
+    def test_custom_reader_and_manifest(self):
+        io.register_reader(
+            io.FormatReader("mysurvey", (1, 0, 2), lambda t, f, e: (t * 86400, f, e))
+        )
+        path = os.path.join(self.tmp, "050525A_Oates.txt")
+        pd.DataFrame({"flux": [1.0, 2.0], "day": [1.0, 2.0], "err": [0.1, 0.2]}).to_csv(
+            path, sep="\t", index=False
+        )
+
+        df = io.read_data(path, manifest={"*_Oates.txt": "mysurvey"})
+        np.testing.assert_allclose(10 ** df["time_sec"], [86400, 172800])
+        np.testing.assert_allclose(10 ** df["flux"], [1.0, 2.0])
+
+
+class TestCompressed(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.text = "time\tflux\tflux_err\n100\t1e-12\t1e-13\n1000\t1e-13\t1e-14\n"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, suffix, opener):
+        path = os.path.join(self.tmp, f"050525A_flux.txt{suffix}")
+        with opener(path, "wt") as f:
+            f.write(self.text)
+        return path
+
+    def test_read_compressed(self):
+        import bz2
+        import gzip
+        import lzma
+
+        plain = self._write("", open)
+        expected = io.read_data(plain)
+        self.assertEqual(io.check_header(plain), 0)
+
+        for suffix, opener in ((".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)):
+            path = self._write(suffix, opener)
+            self.assertEqual(io.check_header(path), 0)
+            pd.testing.assert_frame_equal(io.read_data(path), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Tests for `grblc.convert.resolver`."""
+import os
+import tempfile
+import unittest
+
+from grblc.convert.cache import ExtinctionCache
+from grblc.convert.resolver import PositionResolver
+
+
+class LocalBackend:
+    """Stand-in for Simbad that records the lookups it gets."""
+
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = []
+
+    def resolve(self, names):
+        self.calls.append(list(names))
+        return {n: self.positions[n] for n in names if n in self.positions}
+
+
+class TestPositionResolver(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = ExtinctionCache(os.path.join(self._tmp.name, "cache.sqlite"))
+        self.backend = LocalBackend({"999999A": (10.5, -3.25), "999999B": (200.0, 45.0)})
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _resolver(self):
+        return PositionResolver(backend=self.backend, cache=self.cache)
+
+    def test_grb_attrs_first(self):
+        resolver = self._resolver()
+        ra, dec = resolver.resolve("980326")
+        self.assertAlmostEqual(ra, 15 * (8 + 36 / 60 + 34.28 / 3600))
+        self.assertAlmostEqual(dec, -(18 + 51 / 60 + 23.9 / 3600))
+        self.assertEqual(self.backend.calls, [])
+
+    def test_one_batched_lookup(self):
+        resolver = self._resolver()
+        names = ["999999A", "980326", "999999B", "999999C"] * 3
+        positions = resolver.resolve_many(names)
+
+        self.assertEqual(self.backend.calls, [["999999A", "999999B", "999999C"]])
+        self.assertEqual(positions["999999B"], (200.0, 45.0))
+        self.assertNotIn("999999C", positions)
+
+        # nothing is looked up twice, whether or not it was found
+        for _ in range(5):
+            self.assertEqual(resolver.resolve("999999A"), (10.5, -3.25))
+            self.assertRaises(LookupError, resolver.resolve, "999999C")
+        self.assertEqual(len(self.backend.calls), 1)
+
+    def test_persistent_cache(self):
+        self._resolver().resolve("999999A")
+
+        # a new resolver (e.g. in another process) finds it in the cache
+        self.backend.calls = []
+        self.assertEqual(self._resolver().resolve("999999A"), (10.5, -3.25))
+        self.assertEqual(self.backend.calls, [])
+
+    def test_missing_persisted(self):
+        self.assertRaises(LookupError, self._resolver().resolve, "999999C")
+
+        # a new resolver remembers that it couldn't be found
+        self.assertRaises(LookupError, self._resolver().resolve, "999999C")
+        self.assertEqual(self.backend.calls, [["999999C"]])
+
+        # until the failed lookups are cleared
+        self.cache.clear_missing_positions()
+        self.backend.positions["999999C"] = (1.0, 2.0)
+        self.assertEqual(self._resolver().resolve("999999C"), (1.0, 2.0))
+        self.assertFalse(self.cache.is_missing_position("999999C"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,7 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 #
 import unittest
+import unittest.mock
 
 import astropy.coordinates as coords
 import numpy as np
@@ -30,12 +31,41 @@ except ImportError as error:
     import json
 
 import os
+import tempfile
 import time
 
+import astropy.io.fits as fits
+
+import grblc.convert.cache as cache
 import grblc.convert.sfd.sfd as sfd
 from grblc.convert.convert import _check_dust_maps
 from grblc.convert.sfd.std_paths import *
 
+
+def make_sfd_maps(map_dir, size=128, seed=0):
+    """
+    Writes small random maps with the same ZEA polar projection as the
+    SFD'98 maps, so the query code can be tested without downloading them.
+    """
+    rng = np.random.default_rng(seed)
+    # SFD'98 maps are 4096 pixels across with a 0.0396 deg pixel scale at the pole
+    scale = 0.0395646818 * 4096 / size
+
+    for pole, sign in (('ngp', 1), ('sgp', -1)):
+        header = fits.Header()
+        header['CTYPE1'] = 'GLON-ZEA'
+        header['CTYPE2'] = 'GLAT-ZEA'
+        header['CRPIX1'] = size / 2 + 0.5
+        header['CRPIX2'] = size / 2 + 0.5
+        header['CRVAL1'] = 0.
+        header['CRVAL2'] = 90. * sign
+        header['CDELT1'] = -scale * sign
+        header['CDELT2'] = scale * sign
+        header['LONPOLE'] = 180.
+        data = rng.uniform(0, 1, (size, size)).astype('>f4')
+        fits.PrimaryHDU(data, header).writeto(
+            os.path.join(map_dir, f'SFD_dust_4096_{pole}.fits'))
+
 class TestSFD(unittest.TestCase):
     @classmethod
     def setUpClass(self):
@@ -153,5 +183,255 @@ class TestSFD(unittest.TestCase):
         with self.assertRaises(TypeError):
             self._sfd(c)
 
+class TestSFDLocal(unittest.TestCase):
+    """
+    Tests of the map loading and sampling code, using small synthetic maps.
+    """
+    @classmethod
+    def setUpClass(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.map_dir = self._tmp.name
+        make_sfd_maps(self.map_dir)
+        cache.get_extinction_cache(os.path.join(self.map_dir, 'cache.sqlite'))
+
+    @classmethod
+    def tearDownClass(self):
+        sfd.close_sfd_query()
+        cache.close_extinction_cache()
+        self._tmp.cleanup()
+
+    def _random_gal(self, n, seed=1):
+        rng = np.random.default_rng(seed)
+        l = rng.uniform(0, 360, n)
+        b = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+        return l, b
+
+    def test_lazy_poles(self):
+        q = sfd.SFDQuery(map_dir=self.map_dir)
+        self.assertEqual(q._data, {})
+
+        q.query_gal(10., 45.)
+        self.assertEqual(list(q._data), ['ngp'])
+
+        q.query_gal(10., -45.)
+        self.assertEqual(sorted(q._data), ['ngp', 'sgp'])
+        q.close()
+
+    def test_windowed_sampling(self):
+        """
+        Sampling a block of the map matches interpolating over the whole map.
+        """
+        from scipy.ndimage import map_coordinates
+
+        q = sfd.SFDQuery(map_dir=self.map_dir)
+        for n in (1, 5, 500):
+            l, b = self._random_gal(n, seed=n)
+            for order in (0, 1):
+                ebv = q.query_gal(l, b, order=order)
+
+                expected = np.empty(n, dtype='f4')
+                for pole, m in (('ngp', b >= 0), ('sgp', b < 0)):
+                    data, w = q._pole(pole)
+                    x, y = q._world2pix(pole, l[m], b[m])
+                    expected[m] = map_coordinates(data, [y, x], order=order, mode='nearest')
+
+                np.testing.assert_array_equal(np.atleast_1d(ebv), expected)
+        q.close()
+
+    def test_spline_cache(self):
+        """
+        Cached spline coefficients give the same result as prefiltering the
+        whole map on every call.
+        """
+        from scipy.ndimage import map_coordinates
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            q = sfd.SFDQuery(map_dir=self.map_dir, spline_cache_dir=cache_dir)
+            l, b = self._random_gal(300, seed=3)
+            for order in (2, 3):
+                ebv = q.query_gal(l, b, order=order)
+
+                expected = np.empty(len(l), dtype='f4')
+                for pole, m in (('ngp', b >= 0), ('sgp', b < 0)):
+                    data, w = q._pole(pole)
+                    x, y = q._world2pix(pole, l[m], b[m])
+                    expected[m] = map_coordinates(
+                        np.asarray(data, dtype='f4'), [y, x], order=order, mode='nearest')
+
+                np.testing.assert_array_equal(ebv, expected)
+                self.assertIn(('ngp', order), q._coefficients)
+
+            self.assertEqual(len(os.listdir(cache_dir)), 4)
+            q.close()
+
+            # a new query object reuses the files on disk
+            q = sfd.SFDQuery(map_dir=self.map_dir, spline_cache_dir=cache_dir)
+            with unittest.mock.patch.object(sfd, 'spline_filter') as spline_filter:
+                np.testing.assert_array_equal(q.query_gal(l, b, order=3), ebv)
+                spline_filter.assert_not_called()
+            q.close()
+
+    def test_zea_projection(self):
+        """
+        The analytic ZEA transform matches WCSLIB to well below a pixel.
+        """
+        import astropy.wcs as wcs
+
+        l, b = self._random_gal(2000)
+        for sign in (1, -1):
+            for lonpole, cdelt1, crval1 in ((180., -1., 0.), (0., 1., 0.), (180., 1., 30.)):
+                header = fits.Header()
+                header['CTYPE1'] = 'GLON-ZEA'
+                header['CTYPE2'] = 'GLAT-ZEA'
+                header['CRPIX1'] = 2048.5
+                header['CRPIX2'] = 2048.5
+                header['CRVAL1'] = crval1
+                header['CRVAL2'] = 90. * sign
+                header['CD1_1'] = 0.0395646818 * cdelt1
+                header['CD2_2'] = 0.0395646818 * sign
+                header['LONPOLE'] = lonpole
+                w = wcs.WCS(header)
+
+                proj = sfd.ZEAPolarProjection.from_wcs(w)
+                self.assertIsNotNone(proj)
+
+                m = (sign * b) >= 0
+                x, y = proj.world2pix(l[m], b[m])
+                x_wcs, y_wcs = w.wcs_world2pix(l[m], b[m], 0)
+                np.testing.assert_allclose(x, x_wcs, rtol=0, atol=1e-6)
+                np.testing.assert_allclose(y, y_wcs, rtol=0, atol=1e-6)
+
+        header['CTYPE1'], header['CTYPE2'] = 'GLON-TAN', 'GLAT-TAN'
+        self.assertIsNone(sfd.ZEAPolarProjection.from_wcs(wcs.WCS(header)))
+
+    def test_analytic_matches_wcs(self):
+        l, b = self._random_gal(300)
+        fast = sfd.SFDQuery(map_dir=self.map_dir)
+        slow = sfd.SFDQuery(map_dir=self.map_dir, analytic_projection=False)
+        np.testing.assert_allclose(
+            fast.query_gal(l, b), slow.query_gal(l, b), rtol=1e-5, atol=1e-6)
+        fast.close()
+        slow.close()
+
+    def test_icrs_to_galactic(self):
+        from grblc.convert.sfd.map_base import icrs_to_galactic
+
+        rng = np.random.default_rng(2)
+        ra = rng.uniform(0, 360, 500)
+        dec = np.degrees(np.arcsin(rng.uniform(-1, 1, 500)))
+        gal = coords.SkyCoord(ra, dec, unit='deg', frame='icrs').galactic
+
+        l, b = icrs_to_galactic(ra, dec)
+        dl = (l - gal.l.deg + 180.) % 360. - 180.
+        np.testing.assert_allclose(dl * np.cos(np.radians(b)), 0, atol=1e-5)
+        np.testing.assert_allclose(b, gal.b.deg, atol=1e-5)
+
+    def test_array_query(self):
+        q = sfd.SFDQuery(map_dir=self.map_dir)
+        l, b = self._random_gal(120)
+        l, b = l.reshape(4, 30), b.reshape(4, 30)
+
+        ebv = q.query_gal_array(l, b)
+        self.assertEqual(ebv.shape, (4, 30))
+        np.testing.assert_array_equal(ebv, q.query_gal(l, b))
+        self.assertEqual(np.shape(q.query_gal_array(l[0, 0], b[0, 0])), ())
+
+        c = coords.SkyCoord(l, b, unit='deg', frame='galactic').icrs
+        np.testing.assert_allclose(
+            q.query_equ_array(c.ra.deg, c.dec.deg), q(c), rtol=1e-4, atol=1e-6)
+        q.close()
+
+    def test_healpix_pixels(self):
+        from grblc.convert.sfd import healpix
+
+        for nside in (1, 2, 16, 128):
+            pix = np.arange(healpix.nside2npix(nside))
+            theta, phi = healpix.pix2ang(nside, pix)
+            np.testing.assert_array_equal(healpix.ang2pix(nside, theta, phi), pix)
+
+        # values from healpy
+        self.assertEqual(healpix.ang2pix(1, np.pi / 2, 0.), 4)
+        self.assertEqual(healpix.ang2pix(1, np.pi - 0.1, 0.1), 8)
+        self.assertRaises(ValueError, healpix.ang2pix, 3, 0., 0.)
+        self.assertRaises(ValueError, healpix.ang2pix, 1, np.nan, 0.)
+        self.assertRaises(ValueError, healpix.ang2pix, 1, 4., 0.)
+        self.assertRaises(ValueError, healpix.ang2pix, 1, 1., np.inf)
+
+    def test_healpix_query(self):
+        nside = 64
+        fname = sfd.build_sfd_healpix(nside=nside, map_dir=self.map_dir, chunk_size=10000)
+        self.assertTrue(os.path.isfile(fname))
+
+        hp = sfd.SFDHealpixQuery(nside=nside, map_dir=self.map_dir)
+        q = sfd.SFDQuery(map_dir=self.map_dir)
+
+        # exact at the pixel centres
+        theta, phi = sfd.healpix.pix2ang(nside, np.arange(0, 12 * nside**2, 97))
+        l, b = np.degrees(phi), 90. - np.degrees(theta)
+        np.testing.assert_array_equal(hp.query_gal_array(l, b), q.query_gal_array(l, b))
+        np.testing.assert_array_equal(hp.query_gal(l, b), q.query_gal_array(l, b))
+
+        # positions that aren't on the sky are NaN in both
+        l = np.array([10., np.nan, 10., np.inf, 10.])
+        b = np.array([45., 45., np.nan, -30., 95.])
+        with np.errstate(invalid='ignore'):
+            self.assertTrue(np.isnan(q.query_gal_array(l[1:4], b[1:4])).all())
+        ebv = hp.query_gal_array(l, b)
+        self.assertTrue(np.isfinite(ebv[0]))
+        self.assertTrue(np.isnan(ebv[1:]).all())
+        self.assertTrue(np.isnan(hp.query_gal_array(np.nan, 45.)))
+
+        err = sfd.healpix_error(hp, q, n=2000)
+        self.assertTrue(np.isfinite(list(err.values())).all())
+        self.assertLessEqual(err['median_abs'], err['max_abs'])
+
+        # the error measured when the table was built is kept with it
+        recorded = hp.error
+        self.assertEqual((recorded['nside'], recorded['n']), (nside, 100000))
+        self.assertEqual(
+            {k: recorded[k] for k in err}, sfd.healpix_error(hp, q, n=100000))
+
+        shared = sfd.get_sfd_query(map_dir=self.map_dir, nside=nside)
+        self.assertIsInstance(shared, sfd.SFDHealpixQuery)
+        self.assertIsInstance(sfd.reload_sfd_query(map_dir=self.map_dir), sfd.SFDQuery)
+        hp.close()
+        q.close()
+
+    def test_shared(self):
+        q = sfd.reload_sfd_query(map_dir=self.map_dir)
+        self.assertIs(sfd.get_sfd_query(), q)
+        self.assertIs(sfd.get_sfd_query(map_dir=self.map_dir), q)
+
+        sfd.close_sfd_query()
+        self.assertIsNot(sfd.get_sfd_query(map_dir=self.map_dir), q)
+
+    def test_ebv2A_b_loads_once(self):
+        from grblc.convert import convert
+
+        sfd.reload_sfd_query(map_dir=self.map_dir)
+        cache.get_extinction_cache().clear()
+        with unittest.mock.patch.object(sfd, 'SFDQuery') as query:
+            for band in ('Landolt R', 'Landolt V', 'SDSS g'):
+                convert.ebv2A_b('050525A', band, ra='18:32:32.57', dec='+26:20:22.5')
+            query.assert_not_called()
+
+    def test_ebv2A_b_cached(self):
+        from grblc.convert import convert
+
+        sfd.reload_sfd_query(map_dir=self.map_dir)
+        cache.get_extinction_cache().clear()
+        ra, dec = '18:32:32.57', '+26:20:22.5'
+        a_r = convert.ebv2A_b('050525A', 'Landolt R', ra=ra, dec=dec)
+
+        c = coords.SkyCoord(ra, dec, unit=('hourangle', 'deg'))
+        ebv = sfd.get_sfd_query()(c)
+        self.assertEqual(a_r, ebv * convert.ebv2A_b_df['3.1']['Landolt R'])
+
+        # later lookups at the same position are answered from the cache alone
+        with unittest.mock.patch('grblc.convert.sfd.get_sfd_query') as get_query:
+            self.assertEqual(convert.ebv2A_b('050525A', 'Landolt R', ra=ra, dec=dec), a_r)
+            convert.ebv2A_b('050525A', 'SDSS g', ra=ra, dec=dec)
+            get_query.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()